@@ -101,21 +101,19 @@ class CollectorStack(Stack):
         return lambda_fn
 
     def schedule_lambda(self, lambda_fn: _lambda.Function) -> None:
-        # 5 AM PT summer / 4 AM PT winter
-        morning_rule = events.Rule(
+        # Runs hourly; the collector only scrapes (location, model) pairs whose
+        # upstream model has published a run newer than the last one collected
+        freshness_rule = events.Rule(
             self,
-            "MorningScheduleRule",
-            schedule=events.Schedule.cron(minute="0", hour="13"),
+            "FreshnessScheduleRule",
+            schedule=events.Schedule.cron(minute="15", hour="*"),
         )
-        morning_rule.add_target(targets.LambdaFunction(lambda_fn))
-
-        # 6 PM PT summer / 5 PM PT winter
-        evening_rule = events.Rule(
-            self,
-            "EveningScheduleRule",
-            schedule=events.Schedule.cron(minute="0", hour="2"),
+        freshness_rule.add_target(
+            targets.LambdaFunction(
+                lambda_fn,
+                event=events.RuleTargetInput.from_object({"mode": "freshness"}),
+            )
         )
-        evening_rule.add_target(targets.LambdaFunction(lambda_fn))
 
     def create_glue_databases(self) -> None:
         glue.CfnDatabase(
@@ -1,6 +1,294 @@
-def main():
-    print("Hello from weather-collector!")
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+
+# The Lambda image ships src/ as the application root, so mirror that here
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+import collector  # noqa: E402
+import encoding  # noqa: E402
+import replay  # noqa: E402
+import reports  # noqa: E402
+import storage  # noqa: E402
+
+
+def _csv(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="weather-collector",
+        description="Run forecast collections outside of Lambda.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    collect = subparsers.add_parser(
+        "collect", help="Scrape and persist forecasts for locations x models"
+    )
+    collect.add_argument(
+        "--locations",
+        type=_csv,
+        help="Comma separated subset of LOCATIONS keys (default: all)",
+    )
+    collect.add_argument(
+        "--models",
+        type=_csv,
+        help="Comma separated subset of MODELS keys (default: all)",
+    )
+    collect.add_argument(
+        "--engine",
+        choices=["chromium", "firefox", "webkit"],
+        default="chromium",
+        help="Playwright browser engine",
+    )
+    collect.add_argument(
+        "--concurrency", type=int, default=1, help="Pages scraped in parallel"
+    )
+    collect.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Max page loads per second across all workers",
+    )
+    collect.add_argument(
+        "--sleep",
+        nargs=2,
+        type=float,
+        metavar=("MIN", "MAX"),
+        default=(collector.MIN_SLEEP_TIME, collector.MAX_SLEEP_TIME),
+        help="Random jitter before each page load, in seconds",
+    )
+    collect.add_argument(
+        "--storage",
+        default=None,
+        help="Storage URI, e.g. s3://bucket, file:///tmp/wx, memory:// "
+        "(default: STORAGE_URI or s3://$BUCKET, else memory:// for dry runs)",
+    )
+    collect.add_argument("--forecasts-url", default=None, help="Override FORECASTS_URL")
+    collect.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Scrape and encode but do not upload anything",
+    )
+    collect.add_argument(
+        "--only-due",
+        action="store_true",
+        help="Only scrape pairs whose upstream model run is newer than the last collected one",
+    )
+    collect.add_argument(
+        "--context-pool",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Use N isolated browser contexts sharing an on-disk asset cache "
+        "(default: CONTEXT_POOL_SIZE, 0 = one shared context)",
+    )
+    collect.add_argument(
+        "--archive-raw",
+        action="store_true",
+        default=None,
+        help="Archive gzipped raw headers and rows next to each Parquet object",
+    )
+    collect.add_argument(
+        "--encode-processes",
+        type=encoding.parse_processes,
+        default=None,
+        metavar="N",
+        help="Parquet encoding worker processes, or auto "
+        "(default: ENCODE_PROCESSES, 0 = event-loop thread)",
+    )
+    collect.set_defaults(func=cmd_collect)
+
+    replay_cmd = subparsers.add_parser(
+        "replay",
+        help="Regenerate Parquet from archived raw payloads with the current code",
+    )
+    replay_cmd.add_argument(
+        "--from", dest="start", type=date.fromisoformat, required=True
+    )
+    replay_cmd.add_argument("--to", dest="end", type=date.fromisoformat, required=True)
+    replay_cmd.add_argument(
+        "--version",
+        required=True,
+        help="Output version, written under replays/version=<v>/",
+    )
+    replay_cmd.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count, 0 = in-process)",
+    )
+    replay_cmd.add_argument(
+        "--storage",
+        default=None,
+        help="Storage URI holding raw_payloads/ (default: STORAGE_URI or s3://$BUCKET)",
+    )
+    replay_cmd.set_defaults(func=cmd_replay)
+
+    reports_cmd = subparsers.add_parser(
+        "reports",
+        help="Compare the latest run report against recent runs and the budget",
+    )
+    reports_cmd.add_argument(
+        "--days", type=int, default=7, help="Days of run_reports/ history to load"
+    )
+    reports_cmd.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Most recent reports to compare (20 is about a day of hourly runs)",
+    )
+    reports_cmd.add_argument(
+        "--storage",
+        default=None,
+        help="Storage URI holding run_reports/ (default: STORAGE_URI or s3://$BUCKET)",
+    )
+    reports_cmd.set_defaults(func=cmd_reports)
+
+    bench = subparsers.add_parser(
+        "bench-encode",
+        help="Time Parquet encoding in-thread against encoding worker processes",
+    )
+    bench.add_argument("--pairs", type=int, default=32, help="Pairs encoded at once")
+    bench.add_argument("--rows", type=int, default=720, help="Rows per pair")
+    bench.add_argument(
+        "--processes",
+        type=encoding.parse_processes,
+        default=None,
+        metavar="N",
+        help="Worker processes, or auto (default: vCPU count - 1)",
+    )
+    bench.set_defaults(func=cmd_bench_encode)
+
+    return parser
+
+
+def format_table(rows: list[dict], columns: list[tuple]) -> str:
+    lines = [[title for _, title in columns]]
+    for row in rows:
+        lines.append([str(row.get(key, "")) for key, _ in columns])
+
+    widths = [max(len(line[i]) for line in lines) for i in range(len(columns))]
+    rendered = [
+        "  ".join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip()
+        for line in lines
+    ]
+    rendered.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(rendered)
+
+
+def format_timing_table(results: list[dict]) -> str:
+    columns = [
+        ("location", "location"),
+        ("model", "model"),
+        ("rows", "rows"),
+        ("bytes", "bytes"),
+        ("attempts", "tries"),
+        ("wait_s", "wait s"),
+        ("scrape_s", "scrape s"),
+        ("persist_s", "persist s"),
+        ("total_s", "total s"),
+    ]
+    return format_table(results, columns)
+
+
+def cmd_collect(args) -> int:
+    if args.forecasts_url:
+        collector.FORECASTS_URL = args.forecasts_url
+    collector.MIN_SLEEP_TIME, collector.MAX_SLEEP_TIME = args.sleep
+    store = storage.open_store(args.storage) if args.storage else None
+
+    start = time.time()
+    results = asyncio.run(
+        collector.run_job(
+            store=store,
+            locations=args.locations,
+            models=args.models,
+            engine=args.engine,
+            concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            dry_run=args.dry_run,
+            only_due=args.only_due,
+            archive_raw=args.archive_raw,
+            context_pool=args.context_pool,
+            encode_processes=args.encode_processes,
+        )
+    )
+    took = round(time.time() - start, 2)
+
+    print(format_timing_table(results))
+    print(f"Collected {len(results)} pair(s) in {took}s")
+    return 0
+
+
+def cmd_replay(args) -> int:
+    store_uri = args.storage or storage.default_store_uri()
+
+    start = time.time()
+    results = replay.replay(
+        store_uri, args.start, args.end, args.version, processes=args.processes
+    )
+    took = round(time.time() - start, 2)
+
+    rows = sum(r["rows"] for r in results)
+    rate = round(len(results) / took * 60) if took else len(results)
+    print(f"Replayed {len(results)} payload(s), {rows} rows in {took}s ({rate}/min)")
+    return 0
+
+
+def cmd_reports(args) -> int:
+    store = storage.open_store(args.storage or storage.default_store_uri())
+    history = reports.load_recent_reports(
+        store, datetime.now(timezone.utc), days=args.days, limit=args.limit
+    )
+    if not history:
+        print("No run reports found")
+        return 0
+
+    columns = [
+        "started_at",
+        "pairs",
+        "rows",
+        "retries",
+        "duration_s",
+        "duration_per_pair_s",
+        "page_latency_p95_s",
+        "throttle_wait_s",
+        "peak_rss_mb",
+    ]
+    print(format_table(history, [(c, c) for c in columns]))
+
+    *previous, latest = history
+    problems = reports.check_budget(latest, previous)
+    for problem in problems:
+        print(f"REGRESSION {latest['started_at']}: {problem}")
+    return 1 if problems else 0
+
+
+def cmd_bench_encode(args) -> int:
+    results = encoding.benchmark(args.pairs, args.rows, processes=args.processes)
+    columns = [
+        "mode",
+        "pairs",
+        "rows",
+        "bytes",
+        "startup_s",
+        "encode_s",
+        "pairs_per_s",
+        "speedup",
+    ]
+    print(format_table(results, [(c, c) for c in columns]))
+    return 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# Static page assets (DataTables JS/CSS, fonts, page chrome) are identical for
+# every model and location. Caching them on disk under /tmp means they are
+# fetched once per Lambda container rather than once per page.
+ASSET_CACHE_DIR = os.environ.get("ASSET_CACHE_DIR", "/tmp/weather_collector_assets")
+ASSET_CACHE_TTL_S = float(os.environ.get("ASSET_CACHE_TTL_S", str(24 * 3600)))
+CACHEABLE_RESOURCE_TYPES = {"script", "stylesheet", "font", "image"}
+
+# Body is re-served decoded, so transfer framing headers no longer apply
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class AssetCache:
+    def __init__(self, directory: str = None, ttl_s: float = None):
+        self.directory = directory or ASSET_CACHE_DIR
+        self.ttl_s = ASSET_CACHE_TTL_S if ttl_s is None else ttl_s
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+
+    def get(self, url: str):
+        path = self._path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_s:
+                return None
+            with open(path, "rb") as f:
+                header, body = f.read().split(b"\n", 1)
+        except (OSError, ValueError):
+            return None
+        return json.loads(header), body
+
+    def put(self, url: str, status: int, headers: dict, body: bytes) -> None:
+        meta = {
+            "status": status,
+            "headers": {
+                k: v for k, v in headers.items() if k.lower() not in _DROPPED_HEADERS
+            },
+        }
+        # Temp file + rename: concurrent contexts never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(meta).encode() + b"\n" + body)
+            os.replace(tmp_path, self._path(url))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    async def handle_route(self, route) -> None:
+        request = route.request
+        if (
+            request.method != "GET"
+            or request.resource_type not in CACHEABLE_RESOURCE_TYPES
+        ):
+            await route.continue_()
+            return
+
+        cached = self.get(request.url)
+        if cached is not None:
+            meta, body = cached
+            self.hits += 1
+            await route.fulfill(
+                status=meta["status"], headers=meta["headers"], body=body
+            )
+            return
+
+        self.misses += 1
+        try:
+            response = await route.fetch()
+        except Exception as e:
+            print(f"Asset fetch failed for {request.url}: {e}")
+            await route.continue_()
+            return
+        body = await response.body()
+        cache_control = response.headers.get("cache-control", "")
+        if response.status == 200 and "no-store" not in cache_control:
+            self.put(request.url, response.status, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+
+class ContextPool:
+    # A fixed set of isolated browser contexts handed out to workers one pair
+    # at a time. All of them serve static assets from the same AssetCache.
+    def __init__(
+        self, browser, size: int, asset_cache: AssetCache = None, **context_kwargs
+    ):
+        self.browser = browser
+        self.size = size
+        self.asset_cache = asset_cache
+        self.context_kwargs = context_kwargs
+        self._contexts = []
+        self._idle = asyncio.Queue()
+
+    async def start(self) -> "ContextPool":
+        for _ in range(self.size):
+            context = await self.browser.new_context(**self.context_kwargs)
+            if self.asset_cache is not None:
+                await context.route("**/*", self.asset_cache.handle_route)
+            self._contexts.append(context)
+            self._idle.put_nowait(context)
+        return self
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        context = await self._idle.get()
+        try:
+            yield context
+        finally:
+            self._idle.put_nowait(context)
+
+    async def close(self) -> None:
+        for context in self._contexts:
+            await context.close()
+        self._contexts.clear()
@@ -1,12 +1,6 @@
-import io
-import json
 import os
 import asyncio
 import time
-import boto3
-import pandas as pd
-import pyarrow as pa
-import pyarrow.parquet as pq
 from datetime import datetime, timezone
 from playwright.async_api import (
     async_playwright,
@@ -15,10 +9,45 @@ from playwright.async_api import (
 import random
 import time
 
+import browser_pool
+import encoding
+import freshness
+import latest
+import plan
+import replay
+import reports
+import schema
+import storage
+import transform
+
 MODELS = os.environ.get("MODELS", {})
 LOCATIONS = os.environ.get("LOCATIONS", {})
 FORECASTS_URL = os.environ.get("FORECASTS_URL", "")
 
+# Also keep the gzipped raw headers + rows next to each Parquet object so past
+# collections can be regenerated with new transform code (see replay.py)
+ARCHIVE_RAW_PAYLOADS = os.environ.get("ARCHIVE_RAW_PAYLOADS", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Expected columns per model, kept warm across invocations of this container
+SCHEMAS = schema.SchemaRegistry()
+
+# Isolated browser contexts sharing an on-disk static asset cache; 0 uses a
+# single context for every worker
+CONTEXT_POOL_SIZE = int(os.environ.get("CONTEXT_POOL_SIZE", "0"))
+
+# Worker processes for Parquet encoding: 0 encodes on the event-loop thread,
+# "auto" sizes from the vCPU count. Off by default: each run pays for a fresh
+# interpreter next to Chromium, and bench-encode has not shown it paying off.
+# Memory: each worker is its own interpreter with pandas and pyarrow loaded
+# (~135 MB RSS) and holds the encoded row groups of the pairs streaming to
+# it; batches are sent as they are pulled, so the collector itself only
+# holds the batch in flight, as it does when encoding in-thread.
+ENCODE_PROCESSES = os.environ.get("ENCODE_PROCESSES", "0")
+
 # Define the minimum and maximum sleep durations in seconds
 MIN_SLEEP_TIME = 3.0
 MAX_SLEEP_TIME = 10.0
@@ -67,13 +96,47 @@ async def enable_extra_columns(page):
             print(f"Unexpected error clicking {xp}: {e}")
 
 
-async def scrape_spotwx_table(page, url, model_name) -> pd.DataFrame:
+TABLE_HEADERS_JS = """
+() => {
+  const tbl = document.querySelector('table');
+  if (!tbl) return {headers: [], count: 0};
+  const headers = Array.from(tbl.querySelectorAll('thead th, tr th')).map(th => th.innerText.trim());
+  // Fallback if no thead
+  if (headers.length === 0) {
+    const first = tbl.querySelector('tr');
+    if (first) {
+      headers.push(...Array.from(first.querySelectorAll('th')).map(th => th.innerText.trim()));
+    }
+  }
+  return {headers, count: tbl.querySelectorAll('tbody tr').length};
+}
+"""
+
+TABLE_ROWS_JS = """
+([start, end]) => {
+  const tbl = document.querySelector('table');
+  if (!tbl) return [];
+  const trs = tbl.querySelectorAll('tbody tr');
+  const rows = [];
+  for (let i = start; i < Math.min(end, trs.length); i++) {
+    rows.push(Array.from(trs[i].querySelectorAll('td')).map(td => td.innerText.trim()));
+  }
+  return rows;
+}
+"""
+
+# Rows pulled per page.evaluate round trip. Each batch goes straight into the
+# Parquet writer, so peak memory is bounded by this rather than table size.
+ROW_BATCH_SIZE = int(os.environ.get("ROW_BATCH_SIZE", "250"))
+
+
+async def open_spotwx_table(page, url, model_name) -> bool:
     print(f"Loading {model_name} forecast...")
     try:
         await page.goto(url, timeout=20000, wait_until="domcontentloaded")
     except PlaywrightTimeoutError:
         print(f"Timeout navigating to {url}")
-        return pd.DataFrame()
+        return False
 
     # Wait for any table to appear
     table_locator = page.locator("table").first
@@ -81,134 +144,424 @@ async def scrape_spotwx_table(page, url, model_name) -> pd.DataFrame:
         await table_locator.wait_for(state="visible", timeout=10000)
     except PlaywrightTimeoutError:
         print(f"Table not found for {model_name}")
-        return pd.DataFrame()
+        return False
 
     # Enable requested columns
     await enable_extra_columns(page)
+    return True
 
-    # Regrab table after UI changes
-    table_locator = page.locator("table").first
 
-    # Extract header and rows in-page for speed
+async def read_raw_table_headers(page, model_name) -> tuple:
+    # Header row exactly as the page renders it, plus the body row count
     try:
-        data = await page.evaluate(
-            """
-            () => {
-              const tbl = document.querySelector('table');
-              if (!tbl) return {headers: [], rows: []};
-              const headers = Array.from(tbl.querySelectorAll('thead th, tr th')).map(th => th.innerText.trim());
-              const rows = Array.from(tbl.querySelectorAll('tbody tr')).map(tr =>
-                Array.from(tr.querySelectorAll('td')).map(td => td.innerText.trim())
-              );
-              // Fallback if no thead
-              if (headers.length === 0) {
-                const first = tbl.querySelector('tr');
-                if (first) {
-                  headers.push(...Array.from(first.querySelectorAll('th')).map(th => th.innerText.trim()));
-                }
-              }
-              return {headers, rows};
-            }
-            """
-        )
+        data = await page.evaluate(TABLE_HEADERS_JS)
     except Exception as e:
         print(f"Error extracting table via JS for {model_name}: {e}")
-        return pd.DataFrame()
+        return None, 0
+    return data.get("headers") or None, data.get("count") or 0
 
-    headers = data.get("headers") or None
 
-    headers = [h.lower().strip() for h in headers] if headers else None
-    if headers:
-        headers[0] = "forecast_time"
+async def iter_table_rows(page, count: int, batch_size: int = None):
+    batch_size = batch_size or ROW_BATCH_SIZE
+    for start in range(0, count, batch_size):
+        yield await page.evaluate(TABLE_ROWS_JS, [start, start + batch_size])
 
-    rows = data.get("rows") or []
-    if not rows:
-        print(f"No rows parsed for {model_name}")
-        return pd.DataFrame()
 
-    try:
-        df = pd.DataFrame(rows, columns=headers if headers else None)
-        print(f"Parsed table for {model_name} with {len(df)} rows.")
-        return df
-    except Exception as e:
-        print(f"Error building DataFrame for {model_name}: {e}")
-        return pd.DataFrame()
+def check_schema(model_name: str, location: str, headers: list[str]):
+    check = SCHEMAS.check(model_name, headers)
+    if check.status in ("remapped", "drift"):
+        schema.emit_drift_metric(check, location)
+    if not check.conforming:
+        print(
+            f"Schema drift for {model_name} / {location}: missing={check.missing} "
+            f"unexpected={check.unexpected}, quarantining"
+        )
+    elif check.missing:
+        print(
+            f"Missing columns for {model_name} / {location}: {check.missing}, "
+            "writing nulls"
+        )
+    return check
 
 
-def persist_forecast_data(df: pd.DataFrame, model_name: str, location: str):
-    if df is None or df.empty:
-        print(f"No data to persist for {model_name} / {location}")
-        return
+def forecast_key(
+    location: str,
+    model_name: str,
+    collected_time: datetime,
+    prefix: str = "raw_forecasts",
+    suffix: str = ".parquet",
+) -> str:
+    date = f"date={datetime.today().strftime('%Y-%m-%d')}"
+    return f"{prefix}/location={location}/model={model_name.lower()}/{date}/{collected_time.strftime('%Y-%m-%d_%H-%M-%SZ')}{suffix}"
+
+
+async def stream_spotwx_table(
+    page,
+    url: str,
+    model_name: str,
+    location: str,
+    store: storage.Store,
+    dry_run: bool = False,
+    archive_raw: bool = False,
+    snapshot: latest.LatestSnapshot = None,
+    executor: encoding.TransformExecutor = None,
+) -> dict:
+    # Pulls rows from the page in batches and encodes each one straight into
+    # the Parquet writer instead of materialising the whole table first
+    written = {"rows": 0, "bytes": 0, "key": None, "quarantined": False}
+    if not await open_spotwx_table(page, url, model_name):
+        return written
+
+    raw_headers, count = await read_raw_table_headers(page, model_name)
+    if not raw_headers or not count:
+        print(f"No rows parsed for {model_name}")
+        return written
+    headers = schema.normalize_headers(raw_headers)
 
     collected_time = datetime.now(timezone.utc)
-    df["collected_time"] = collected_time
-    df["forecast_time"] = pd.to_datetime(df["forecast_time"], utc=True).dt.tz_localize(
-        None
-    )
-
-    numeric_cols = ["tmp", "dpt", "apcp", "slp", "rqp", "sqp", "fqp", "iqp", "tmp850"]
-    int_cols = ["rh", "ws", "wd", "wg", "cloud", "ws925", "wd925", "ws850"]
-
-    for col in numeric_cols:
-        try:
-            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
-        except KeyError:
-            print(f"Column {col} not found in DataFrame for {model_name} / {location}")
+    check = check_schema(model_name, location, headers)
+    columns = check.columns if check.conforming else headers
+    executor = executor or encoding.TransformExecutor(0)
+    writer = executor.writer(collected_time, coerce=check.conforming)
+    payload = None
+    if archive_raw:
+        payload = replay.PayloadWriter(
+            {
+                "model": model_name,
+                "location": location,
+                "collected_time": collected_time.isoformat(),
+                "url": url,
+                # Unnormalised, so replay picks up changes to header parsing
+                "headers": raw_headers,
+            }
+        )
+    first_forecast_time = None
+    try:
+        async for rows in iter_table_rows(page, count):
+            if first_forecast_time is None and rows:
+                # The forecast time is always the first cell of a row
+                first_forecast_time = rows[0][0]
+            batch = transform.rows_to_batch(columns, rows, check.positions)
+            await executor.write(writer, batch)
+            if payload:
+                payload.write_rows(rows)
+    except Exception as e:
+        print(f"Error extracting table for {model_name}: {e}")
+        await executor.discard(writer)
+        return written
 
-    for col in int_cols:
+    try:
+        body = await executor.finish(writer)
+    except Exception as e:
+        # Worker encoding surfaces coercion errors here rather than in write()
+        print(f"Error encoding table for {model_name}: {e}")
+        return written
+    written.update(
+        rows=writer.rows,
+        bytes=len(body),
+        quarantined=not check.conforming,
+        first_forecast_time=first_forecast_time,
+    )
+    print(f"Parsed table for {model_name} with {writer.rows} rows.")
+    if dry_run:
+        print(f"Dry run: parsed {model_name} / {location}, not uploading")
+        return written
+
+    prefix = schema.QUARANTINE_PREFIX if not check.conforming else "raw_forecasts"
+    key = forecast_key(location, model_name, collected_time, prefix=prefix)
+    start = time.monotonic()
+    store.put(key, body)
+    if payload:
+        # Mirrors the Parquet key so any object can be regenerated by replay
+        archive_key = forecast_key(
+            location,
+            model_name,
+            collected_time,
+            prefix=replay.PAYLOAD_PREFIX,
+            suffix=replay.PAYLOAD_SUFFIX,
+        )
+        archive = payload.finish()
+        store.put(archive_key, archive)
+        written.update(archive_key=archive_key, bytes=len(body) + len(archive))
+    if snapshot and check.conforming:
         try:
-            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int32")
-        except KeyError:
-            print(f"Column {col} not found in DataFrame for {model_name} / {location}")
-
-    table = pa.Table.from_pandas(df, schema=None, preserve_index=False)
-    buffer = io.BytesIO()
-
-    pq.write_table(
-        table,
-        buffer,
-        coerce_timestamps="ms",
-        allow_truncated_timestamps=True,
-        use_deprecated_int96_timestamps=False,
+            snapshot.update(location, model_name, body)
+        except Exception as e:
+            # The forecast itself is stored; only the snapshot misses this pair
+            print(f"Error updating latest snapshot for {model_name} / {location}: {e}")
+    written.update(key=key, persist_s=round(time.monotonic() - start, 3))
+
+    print(f"Persisted {model_name} forecast data for {location} to {store.uri}/{key}")
+    return written
+
+
+def work_plan(locations=None, models=None) -> list[plan.WorkItem]:
+    return plan.work_plan(LOCATIONS, MODELS, FORECASTS_URL, locations, models)
+
+
+class RateLimiter:
+    # Spaces page loads at least 1 / per_second apart across all workers
+    def __init__(self, per_second: float = None):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> float:
+        if not self.interval:
+            return 0.0
+        async with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+async def collect_pair(
+    page,
+    item: plan.WorkItem,
+    store: storage.Store,
+    limiter: RateLimiter,
+    dry_run: bool = False,
+    archive_raw: bool = False,
+    snapshot: latest.LatestSnapshot = None,
+    executor: encoding.TransformExecutor = None,
+) -> dict:
+    start = time.monotonic()
+    await limiter.wait()
+    await asyncio.sleep(random.uniform(MIN_SLEEP_TIME, MAX_SLEEP_TIME))
+    waited = time.monotonic() - start
+
+    print(f"Scraping {item.model_name} from {item.url}...")
+    written = await stream_spotwx_table(
+        page,
+        item.url,
+        item.model_name,
+        item.location,
+        store,
+        dry_run=dry_run,
+        archive_raw=archive_raw,
+        snapshot=snapshot,
+        executor=executor,
     )
 
-    s3 = boto3.client("s3")
-    date = f"date={datetime.today().strftime('%Y-%m-%d')}"
-    key = f"raw_forecasts/location={location}/model={model_name.lower()}/{date}/{collected_time.strftime('%Y-%m-%d_%H-%M-%SZ')}.parquet"
-    s3.put_object(Bucket=os.environ.get("BUCKET"), Key=key, Body=buffer.getvalue())
-
-    print(f"Persisted {model_name} forecast data for {location} to S3 at {key}")
+    end = time.monotonic()
+    persisted = written.get("persist_s", 0.0)
+    return {
+        "location": item.location,
+        "model": item.model_name,
+        "rows": written["rows"],
+        "bytes": written["bytes"],
+        "key": written["key"],
+        "quarantined": written["quarantined"],
+        "first_forecast_time": written.get("first_forecast_time"),
+        # Each pair gets one page load; the run report counts attempts
+        "attempts": 1,
+        "wait_s": round(waited, 3),
+        "scrape_s": round(end - start - waited - persisted, 3),
+        "persist_s": persisted,
+        "total_s": round(end - start, 3),
+        "rss_mb": reports.process_tree_rss_mb(),
+    }
+
+
+async def _collect_worker(context, queue: asyncio.Queue, results: list, **kwargs):
+    page = await context.new_page()
+    while True:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        results.append(await collect_pair(page, item, **kwargs))
 
 
-async def run_job():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=BROWSER_ARGS)
-        context = await browser.new_context(
-            user_agent=USER_AGENT, viewport={"width": 1920, "height": 1080}
-        )
-        page = await context.new_page()
-
-        for location, loc_data in json.loads(LOCATIONS).items():
-            for model_name, model_code in json.loads(MODELS).items():
-                time.sleep(random.uniform(MIN_SLEEP_TIME, MAX_SLEEP_TIME))
+async def _pooled_collect_worker(
+    pool: browser_pool.ContextPool, queue: asyncio.Queue, results: list, **kwargs
+):
+    # Borrows an isolated context per pair and hands it back when done
+    while True:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        async with pool.acquire() as context:
+            page = await context.new_page()
+            try:
+                results.append(await collect_pair(page, item, **kwargs))
+            finally:
+                await page.close()
+
+
+async def run_job(
+    store: storage.Store = None,
+    locations=None,
+    models=None,
+    engine: str = "chromium",
+    concurrency: int = 1,
+    rate_limit: float = None,
+    dry_run: bool = False,
+    only_due: bool = False,
+    archive_raw: bool = None,
+    context_pool: int = None,
+    encode_processes: int = None,
+) -> list[dict]:
+    started_at = datetime.now(timezone.utc)
+    started = time.monotonic()
+    if store is None:
+        # Dry runs upload nothing, so they also work with no storage configured
+        store = storage.default_store(fallback="memory://dry-run" if dry_run else None)
+    if archive_raw is None:
+        archive_raw = ARCHIVE_RAW_PAYLOADS
+    if context_pool is None:
+        context_pool = CONTEXT_POOL_SIZE
+    if encode_processes is None:
+        encode_processes = encoding.parse_processes(ENCODE_PROCESSES)
+    items = work_plan(locations, models)
+    if not dry_run:
+        # Dry runs never touch the store, so they check against the
+        # declared columns and whatever baselines are already in memory
+        SCHEMAS.load(store)
+
+    if only_due:
+        # Skip pairs whose upstream model has not published a newer run
+        now = datetime.now(timezone.utc)
+        state = freshness.load_state(store)
+        total = len(items)
+        items = [
+            item
+            for item in items
+            if freshness.is_due(
+                state, item.location, item.model_name, item.model_code, now
+            )
+        ]
+        print(f"{len(items)} of {total} pairs have a new model run to collect")
+        if not items:
+            return []
+
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    results = []
+    limiter = RateLimiter(rate_limit)
+    snapshot = None if dry_run else latest.LatestSnapshot(store)
+
+    # Workers spawn while the browser launches
+    with encoding.TransformExecutor(encode_processes) as executor:
+        async with async_playwright() as p:
+            # BROWSER_ARGS are Chromium switches; other engines get their defaults
+            args = BROWSER_ARGS if engine == "chromium" else []
+            browser = await getattr(p, engine).launch(headless=True, args=args)
+            context_kwargs = dict(
+                user_agent=USER_AGENT, viewport={"width": 1920, "height": 1080}
+            )
+            worker_kwargs = dict(
+                store=store,
+                limiter=limiter,
+                dry_run=dry_run,
+                archive_raw=archive_raw,
+                snapshot=snapshot,
+                executor=executor,
+            )
+            asset_cache = None
+            if context_pool:
+                asset_cache = browser_pool.AssetCache()
+                pool = await browser_pool.ContextPool(
+                    browser, context_pool, asset_cache, **context_kwargs
+                ).start()
+                workers = [
+                    asyncio.create_task(
+                        _pooled_collect_worker(pool, queue, results, **worker_kwargs)
+                    )
+                    for _ in range(max(1, min(concurrency, context_pool, len(items))))
+                ]
+                close_contexts = pool.close
+            else:
+                context = await browser.new_context(**context_kwargs)
+                workers = [
+                    asyncio.create_task(
+                        _collect_worker(context, queue, results, **worker_kwargs)
+                    )
+                    for _ in range(max(1, min(concurrency, len(items))))
+                ]
+                close_contexts = context.close
+
+            try:
+                await asyncio.gather(*workers)
+            except BaseException:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                raise
+            finally:
+                await close_contexts()
+                await browser.close()
+
+            if asset_cache is not None:
+                print(
+                    f"Asset cache: {asset_cache.hits} hits, {asset_cache.misses} misses"
+                )
 
-                url = (
-                    f"{FORECASTS_URL}?model={model_code}"
-                    f"&lat={loc_data['lat']}&lon={loc_data['lon']}&tz={loc_data['tz']}&display=table"
+    if not dry_run:
+        try:
+            # Pairs dropped from LOCATIONS / MODELS leave the snapshot too
+            snapshot.prune((item.location, item.model_name) for item in work_plan())
+            snapshot.flush()
+        except Exception as e:
+            print(f"Error writing latest snapshot: {e}")
+        SCHEMAS.save(store)
+
+    if only_due and not dry_run:
+        planned = {(item.location, item.model_name): item for item in items}
+        for result in results:
+            if not result["rows"]:
+                continue
+            item = planned[(result["location"], result["model"])]
+            # Record the run the page actually served; if upstream has not
+            # published the expected run yet the pair stays due
+            run = freshness.observed_run(
+                item.model_code, result.get("first_forecast_time"), item.tz
+            )
+            expected = freshness.latest_run(item.model_code, now)
+            if run is None or run < expected:
+                print(
+                    f"{item.model_name} / {item.location} still shows the {run} run, "
+                    f"expected {expected}; will retry"
                 )
-                print(f"Scraping {model_name} from {url}...")
-                df = await scrape_spotwx_table(page, url, model_name)
-                persist_forecast_data(df, model_name, location)
+                continue
+            freshness.mark_collected(state, item.location, item.model_name, run)
+        freshness.save_state(store, state)
+
+    if not dry_run:
+        report = reports.build_report(
+            results,
+            started_at,
+            time.monotonic() - started,
+            engine=engine,
+            concurrency=concurrency,
+            only_due=only_due,
+            context_pool=context_pool,
+            encode_processes=executor.processes,
+            asset_cache_hits=asset_cache.hits if asset_cache else None,
+            asset_cache_misses=asset_cache.misses if asset_cache else None,
+        )
+        history = reports.load_recent_reports(store, started_at)
+        key = reports.write_report(store, report)
+        print(
+            f"Run report {key}: {report['pairs']} pairs, {report['rows']} rows, "
+            f"p95 page {report['page_latency_p95_s']}s"
+        )
+        for problem in reports.check_budget(report, history):
+            print(f"Performance budget exceeded: {problem}")
 
-        await context.close()
-        await browser.close()
+    return results
 
 
 def lambda_handler(event, context):
     start = time.time()
     try:
         asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
-        asyncio.run(run_job())
+        asyncio.run(run_job(only_due=(event or {}).get("mode") == "freshness"))
         took = round(time.time() - start, 2)
         return {
             "statusCode": 200,
@@ -0,0 +1,343 @@
+import asyncio
+import multiprocessing
+import os
+import random
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+
+import transform
+
+
+def default_processes() -> int:
+    # Lambda grants vCPUs in proportion to memory; one stays with the event
+    # loop and the browser, the rest encode. 0 means encode in-thread.
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(0, cpus - 1)
+
+
+def parse_processes(value) -> int:
+    # "auto" (or unset) sizes from the vCPU count, otherwise an integer
+    if value is None or str(value).strip().lower() in ("", "auto"):
+        return default_processes()
+    return max(0, int(value))
+
+
+class EncodeError(RuntimeError):
+    # An encoding failure inside a worker, or a worker that died mid-pair.
+    # Always picklable, unlike some of the pandas/Arrow exceptions it wraps.
+    pass
+
+
+def _batch_bytes(batch) -> pa.Buffer:
+    # One batch as an Arrow IPC stream. The pipe copies it across and the
+    # worker reads its columns straight out of the received bytes.
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def _worker_main(conn) -> None:
+    # Messages, each for one pair:
+    #   ("batch", pair, collected_time iso, coerce) then the batch's IPC bytes
+    #   ("finish", pair): reply None then the Parquet bytes, or an EncodeError
+    #   ("discard", pair): drop whatever was written
+    # Only "finish" replies, so the parent never has replies to route.
+    writers, errors = {}, {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        kind, pair, *args = message
+        if kind == "batch":
+            buffer = conn.recv_bytes()
+            if pair in errors:
+                continue
+            try:
+                if pair not in writers:
+                    collected_time, coerce = args
+                    writers[pair] = transform.ForecastParquetWriter(
+                        datetime.fromisoformat(collected_time), coerce=coerce
+                    )
+                for batch in pa.ipc.open_stream(pa.py_buffer(buffer)):
+                    writers[pair].write(batch)
+            except Exception as e:
+                writers.pop(pair, None)
+                errors[pair] = EncodeError(f"{type(e).__name__}: {e}")
+        elif kind == "finish":
+            error = errors.pop(pair, None)
+            writer = writers.pop(pair, None)
+            if error is None:
+                try:
+                    body = writer.finish() if writer else b""
+                except Exception as e:
+                    error = EncodeError(f"{type(e).__name__}: {e}")
+            if error is not None:
+                conn.send(error)
+                continue
+            conn.send(None)
+            conn.send_bytes(body)
+        elif kind == "discard":
+            writers.pop(pair, None)
+            errors.pop(pair, None)
+
+
+def _send_batch(conn, header: tuple, buffer) -> None:
+    conn.send(header)
+    conn.send_bytes(buffer)
+
+
+def _finish_roundtrip(conn, pair: int) -> bytes:
+    conn.send(("finish", pair))
+    error = conn.recv()
+    if error is not None:
+        raise error
+    return conn.recv_bytes()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        # Serialises use of the pipe, so a finish reply is never interleaved
+        self.lock = asyncio.Lock()
+        self.pairs = 0
+        self.alive = True
+
+
+class WorkerWriter:
+    # One pair's batches, sent to a worker process as they arrive so neither
+    # process holds the pair's string table. The worker is picked at the
+    # first batch; if none is left by then the pair is encoded in-thread.
+    def __init__(self, collected_time: datetime, coerce: bool = True):
+        self.collected_time = collected_time
+        self.coerce = coerce
+        self.rows = 0
+        self.worker = None
+        self.local = None
+        self.pair = None
+
+
+class TransformExecutor:
+    # Parquet encoding off the event-loop thread, in spawned worker processes
+    # that each own one end of a Pipe. Pipes rather than ProcessPoolExecutor
+    # because its queues need POSIX semaphores, which Lambda (no /dev/shm)
+    # lacks. With processes=0, if workers cannot start, or once they have all
+    # died, encoding happens in-thread exactly as before.
+    def __init__(self, processes: int = None):
+        self.processes = default_processes() if processes is None else processes
+        self._workers = []
+        self._next_pair = 0
+
+    def start(self) -> "TransformExecutor":
+        # Spawned rather than forked: Arrow keeps threads that do not survive fork()
+        context = multiprocessing.get_context("spawn")
+        try:
+            for _ in range(self.processes):
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_worker_main, args=(child,), daemon=True
+                )
+                process.start()
+                child.close()
+                self._workers.append(_Worker(process, parent))
+        except OSError as e:
+            print(f"Encode workers unavailable ({e}); encoding in-thread")
+            self.close()
+        self.processes = len(self._workers)
+        return self
+
+    def __enter__(self) -> "TransformExecutor":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def writer(self, collected_time: datetime, coerce: bool = True):
+        if self.processes:
+            return WorkerWriter(collected_time, coerce)
+        return transform.ForecastParquetWriter(collected_time, coerce=coerce)
+
+    async def write(self, writer, batch) -> None:
+        if not isinstance(writer, WorkerWriter):
+            writer.write(batch)
+            return
+        if writer.worker is None and writer.local is None:
+            self._assign(writer)
+        if writer.local is not None:
+            writer.local.write(batch)
+            writer.rows = writer.local.rows
+            return
+
+        worker = writer.worker
+        header = (
+            "batch",
+            writer.pair,
+            writer.collected_time.isoformat(),
+            writer.coerce,
+        )
+        buffer = _batch_bytes(batch)
+        async with worker.lock:
+            if not worker.alive:
+                raise EncodeError("Encode worker died")
+            try:
+                await asyncio.to_thread(_send_batch, worker.conn, header, buffer)
+            except (EOFError, OSError) as e:
+                self._retire(worker, e)
+                raise EncodeError(f"Encode worker died ({e!r})") from e
+        writer.rows += batch.num_rows
+
+    async def finish(self, writer) -> bytes:
+        if not isinstance(writer, WorkerWriter):
+            return writer.finish()
+        if writer.local is not None:
+            return writer.local.finish()
+        if writer.worker is None:
+            return b""
+
+        worker = writer.worker
+        worker.pairs -= 1
+        async with worker.lock:
+            if not worker.alive:
+                raise EncodeError("Encode worker died")
+            try:
+                return await asyncio.to_thread(
+                    _finish_roundtrip, worker.conn, writer.pair
+                )
+            except (EOFError, OSError) as e:
+                self._retire(worker, e)
+                raise EncodeError(f"Encode worker died ({e!r})") from e
+
+    async def discard(self, writer) -> None:
+        # Frees what a worker holds for a pair that will not be finished
+        if not isinstance(writer, WorkerWriter) or writer.worker is None:
+            return
+        worker, writer.worker = writer.worker, None
+        worker.pairs -= 1
+        async with worker.lock:
+            if not worker.alive:
+                return
+            try:
+                await asyncio.to_thread(worker.conn.send, ("discard", writer.pair))
+            except (EOFError, OSError) as e:
+                self._retire(worker, e)
+
+    def _assign(self, writer: WorkerWriter) -> None:
+        live = [worker for worker in self._workers if worker.alive]
+        if not live:
+            writer.local = transform.ForecastParquetWriter(
+                writer.collected_time, coerce=writer.coerce
+            )
+            return
+        writer.worker = min(live, key=lambda worker: worker.pairs)
+        writer.worker.pairs += 1
+        self._next_pair += 1
+        writer.pair = self._next_pair
+
+    def _retire(self, worker: _Worker, error) -> None:
+        # Pairs already streaming to it fail; new pairs go to the other
+        # workers, or in-thread once none are left
+        print(f"Encode worker failed ({error!r}); retiring it")
+        worker.alive = False
+        worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+        self._workers.remove(worker)
+        self.processes = len(self._workers)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.conn.close()
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+        self._workers.clear()
+
+
+def synthetic_rows(count: int, seed: int = 0) -> tuple[list[str], list[list]]:
+    rng = random.Random(seed)
+    columns = ["forecast_time", "tmp", "dpt", "rh", "wind_dir", "wind_spd", "apcp"]
+    rows = [
+        [
+            f"2025-08-{1 + h // 24:02d} {h % 24:02d}:00",
+            f"{rng.uniform(-20, 30):.1f}",
+            f"{rng.uniform(-25, 20):.1f}",
+            str(rng.randint(10, 100)),
+            str(rng.randint(0, 359)),
+            str(rng.randint(0, 60)),
+            f"{rng.uniform(0, 5):.1f}",
+        ]
+        for h in range(count)
+    ]
+    return columns, rows
+
+
+def benchmark(
+    pairs: int = 32, rows: int = 720, processes: int = None, batch_size: int = 250
+) -> list[dict]:
+    # Encodes the same synthetic pairs in-thread and through the workers,
+    # with every pair in flight at once as concurrent collection would have
+    columns, data = synthetic_rows(rows)
+    collected_time = datetime.now(timezone.utc)
+
+    async def encode_all(executor: TransformExecutor) -> list[bytes]:
+        async def one() -> bytes:
+            writer = executor.writer(collected_time)
+            for start in range(0, len(data), batch_size):
+                chunk = data[start : start + batch_size]
+                await executor.write(writer, transform.rows_to_batch(columns, chunk))
+            return await executor.finish(writer)
+
+        return await asyncio.gather(*(one() for _ in range(pairs)))
+
+    async def warm(executor: TransformExecutor) -> None:
+        # One tiny pair per worker, so timings exclude interpreter start-up
+        writers = [executor.writer(collected_time) for _ in range(executor.processes)]
+        for writer in writers:
+            await executor.write(writer, transform.rows_to_batch(columns, data[:1]))
+        await asyncio.gather(*(executor.finish(writer) for writer in writers))
+
+    async def run(processes: int) -> dict:
+        started = time.monotonic()
+        executor = TransformExecutor(processes).start()
+        try:
+            await warm(executor)
+            ready = time.monotonic()
+            bodies = await encode_all(executor)
+            took = time.monotonic() - ready
+        finally:
+            executor.close()
+        mode = (
+            f"{executor.processes} process(es)" if executor.processes else "in-thread"
+        )
+        return {
+            "mode": mode,
+            "pairs": pairs,
+            "rows": pairs * rows,
+            "bytes": sum(len(body) for body in bodies),
+            "startup_s": round(ready - started, 3),
+            "encode_s": round(took, 3),
+            "pairs_per_s": round(pairs / took, 1) if took else None,
+        }
+
+    processes = default_processes() if processes is None else processes
+    results = [asyncio.run(run(0))]
+    if processes:
+        results.append(asyncio.run(run(processes)))
+        results[-1]["speedup"] = round(
+            results[0]["encode_s"] / results[-1]["encode_s"], 2
+        )
+    return results
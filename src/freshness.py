@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+import storage
+
+# Upstream publication cycles keyed by SpotWX model code prefix:
+#   (hours between runs, hours from run time until the run shows up on SpotWX)
+# Longest prefix wins, so "gem_lam" is matched before a bare "gem" would be.
+MODEL_CYCLES = {
+    "hrrr": (1, 2.0),
+    "rap": (1, 1.5),
+    "nam": (6, 2.0),
+    "gfs": (6, 4.5),
+    "icon": (6, 4.0),
+    "hrdps": (6, 4.5),
+    "gem_lam": (6, 4.5),
+    "rdps": (6, 4.0),
+    "gem_reg": (6, 4.0),
+    "gdps": (12, 5.0),
+    "gem_glb": (12, 5.0),
+    "ecmwf": (12, 8.0),
+}
+DEFAULT_CYCLE = (6, 5.0)
+
+STATE_KEY = "state/freshness.json"
+
+
+def model_cycle(model_code: str) -> tuple:
+    code = model_code.lower()
+    matches = [prefix for prefix in MODEL_CYCLES if code.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CYCLE
+    return MODEL_CYCLES[max(matches, key=len)]
+
+
+def latest_run(model_code: str, now: datetime) -> datetime:
+    # Newest run whose publication delay has elapsed by `now`
+    cycle_hours, delay_hours = model_cycle(model_code)
+    available = now.astimezone(timezone.utc) - timedelta(hours=delay_hours)
+    return available.replace(
+        hour=available.hour - available.hour % cycle_hours,
+        minute=0,
+        second=0,
+        microsecond=0,
+    )
+
+
+def observed_run(model_code: str, first_forecast_time: str, tz: str):
+    # Run a scraped table came from: its first forecast hour, read in the
+    # page's time zone unless it carries an offset, floored to the model's
+    # cycle. None if the cell does not parse as a time.
+    try:
+        first = pd.Timestamp(first_forecast_time)
+    except (TypeError, ValueError):
+        return None
+    if pd.isna(first):
+        return None
+    first = first.to_pydatetime()
+    if first.tzinfo is None:
+        first = first.replace(tzinfo=ZoneInfo(tz))
+    first = first.astimezone(timezone.utc)
+    cycle_hours, _ = model_cycle(model_code)
+    return first.replace(
+        hour=first.hour - first.hour % cycle_hours, minute=0, second=0, microsecond=0
+    )
+
+
+def load_state(store: storage.Store) -> dict:
+    # {model_name: {location: last observed run as ISO-8601}}
+    try:
+        return json.loads(store.get(STATE_KEY))
+    except KeyError:
+        return {}
+
+
+def save_state(store: storage.Store, state: dict) -> None:
+    store.put(STATE_KEY, json.dumps(state, sort_keys=True, indent=2).encode())
+
+
+def last_collected(state: dict, location: str, model_name: str):
+    value = state.get(model_name, {}).get(location)
+    return datetime.fromisoformat(value) if value else None
+
+
+def mark_collected(
+    state: dict, location: str, model_name: str, run_time: datetime
+) -> None:
+    state.setdefault(model_name, {})[location] = run_time.isoformat()
+
+
+def is_due(
+    state: dict, location: str, model_name: str, model_code: str, now: datetime
+) -> bool:
+    last = last_collected(state, location, model_name)
+    return last is None or last < latest_run(model_code, now)
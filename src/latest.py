@@ -0,0 +1,105 @@
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import storage
+import transform
+
+# Newest forecast per (location, model), for readers that only want "now":
+#   latest/location=<location>/model=<model>.parquet  one object per pair
+#   latest/all.parquet                                 every pair in one GET
+LATEST_PREFIX = "latest"
+ALL_KEY = f"{LATEST_PREFIX}/all.parquet"
+
+# all.parquet is rebuilt in memory after every pair but re-uploaded at most
+# this often, plus once when the run finishes, so large runs do not re-encode
+# the combined table hundreds of times
+FLUSH_INTERVAL_S = float(os.environ.get("LATEST_FLUSH_INTERVAL_S", "15"))
+
+
+def pair_key(location: str, model_name: str) -> str:
+    return f"{LATEST_PREFIX}/location={location}/model={model_name.lower()}.parquet"
+
+
+def read_latest(store: storage.Store) -> pa.Table:
+    return pq.read_table(pa.BufferReader(store.get(ALL_KEY)))
+
+
+class LatestSnapshot:
+    def __init__(self, store: storage.Store, flush_interval_s: float = None):
+        self.store = store
+        self.flush_interval_s = (
+            FLUSH_INTERVAL_S if flush_interval_s is None else flush_interval_s
+        )
+        self._table = None
+        self._loaded = False
+        self._dirty = False
+        self._last_flush = float("-inf")
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        try:
+            self._table = read_latest(self.store)
+        except KeyError:
+            self._table = None
+        self._loaded = True
+
+    def prune(self, pairs) -> None:
+        # Drop rows for (location, model) pairs no longer in the work plan
+        self._load()
+        if self._table is None:
+            return
+        keep = pa.array(
+            [f"{location}/{model_name.lower()}" for location, model_name in pairs],
+            pa.string(),
+        )
+        current = pc.binary_join_element_wise(
+            self._table["location"], self._table["model"], "/"
+        )
+        mask = pc.is_in(current, value_set=keep)
+        if not pc.all(mask).as_py():
+            self._table = self._table.filter(mask)
+            self._dirty = True
+
+    def update(self, location: str, model_name: str, body: bytes) -> None:
+        # body is the Parquet object just written to raw_forecasts/
+        model = model_name.lower()
+        self.store.put(pair_key(location, model), body)
+
+        table = pq.read_table(pa.BufferReader(body))
+        table = table.append_column(
+            "location", pa.array([location] * table.num_rows, pa.string())
+        ).append_column("model", pa.array([model] * table.num_rows, pa.string()))
+
+        self._load()
+        if self._table is None or not self._table.num_rows:
+            self._table = table
+        else:
+            stale = pc.and_(
+                pc.equal(self._table["location"], location),
+                pc.equal(self._table["model"], model),
+            )
+            # The pair's old rows go first, so if the new ones cannot be
+            # merged (e.g. a column changed type) readers see no stale data
+            self._table = self._table.filter(pc.invert(stale))
+            self._dirty = True
+            self._table = pa.concat_tables(
+                [self._table, table], promote_options="default"
+            )
+        self._dirty = True
+
+        if time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+        sink = pa.BufferOutputStream()
+        pq.write_table(self._table, sink, **transform.PARQUET_OPTIONS)
+        self.store.put(ALL_KEY, sink.getvalue().to_pybytes())
+        self._dirty = False
+        self._last_flush = time.monotonic()
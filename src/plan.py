@@ -0,0 +1,191 @@
+import functools
+import json
+import os
+from dataclasses import dataclass
+from urllib.parse import quote, unquote
+from zoneinfo import ZoneInfo
+
+import boto3
+
+import freshness
+
+# Rough seconds per page load, keyed by model code prefix like freshness cycles.
+# Long-range global models render many more rows than short-range ones.
+MODEL_COST_SECONDS = {
+    "hrrr": 6.0,
+    "rap": 6.0,
+    "nam": 8.0,
+    "hrdps": 8.0,
+    "gem_lam": 8.0,
+    "rdps": 9.0,
+    "gem_reg": 9.0,
+    "icon": 10.0,
+    "gfs": 12.0,
+    "gdps": 12.0,
+    "gem_glb": 12.0,
+    "ecmwf": 12.0,
+}
+DEFAULT_COST_SECONDS = 10.0
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    location: str
+    lat: float
+    lon: float
+    tz: str
+    model_name: str
+    model_code: str
+    url: str
+    # Lower runs first: models with short publication cycles go stale fastest
+    priority: int
+    # Estimated seconds to load, extract and persist
+    cost: float
+
+
+def forecast_url(
+    base_url: str, model_code: str, lat: float, lon: float, tz: str
+) -> str:
+    return (
+        f"{base_url}?model={model_code}"
+        f"&lat={lat}&lon={lon}&tz={quote(tz, safe='')}&display=table"
+    )
+
+
+def model_cost(model_code: str) -> float:
+    code = model_code.lower()
+    matches = [prefix for prefix in MODEL_COST_SECONDS if code.startswith(prefix)]
+    if not matches:
+        return DEFAULT_COST_SECONDS
+    return MODEL_COST_SECONDS[max(matches, key=len)]
+
+
+def _valid_tz(tz: str) -> bool:
+    # Only names the tz database actually has, e.g. not "Foo/Bar"
+    try:
+        ZoneInfo(tz)
+    except (ValueError, KeyError, OSError):
+        return False
+    return True
+
+
+def _parse_json(raw, name: str) -> dict:
+    try:
+        value = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{name} is not valid JSON: {e}") from e
+    if not isinstance(value, dict):
+        raise ValueError(f"{name} must be a JSON object, got {type(value).__name__}")
+    return value
+
+
+def parse_locations(raw) -> dict:
+    errors = []
+    locations = {}
+    for name, entry in _parse_json(raw, "LOCATIONS").items():
+        if not isinstance(entry, dict):
+            errors.append(f"{name}: expected an object with lat, lon and tz")
+            continue
+        try:
+            lat, lon = float(entry["lat"]), float(entry["lon"])
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"{name}: lat and lon must be numbers")
+            continue
+        if not -90 <= lat <= 90:
+            errors.append(f"{name}: lat {lat} out of range")
+        if not -180 <= lon <= 180:
+            errors.append(f"{name}: lon {lon} out of range")
+        # tz may arrive URL-encoded (America%2FVancouver) or plain
+        tz = unquote(str(entry.get("tz", "")))
+        if not _valid_tz(tz):
+            errors.append(f"{name}: invalid tz {entry.get('tz')!r}")
+        locations[name] = {"lat": lat, "lon": lon, "tz": tz}
+
+    if errors:
+        raise ValueError("Invalid LOCATIONS config: " + "; ".join(errors))
+    return locations
+
+
+def parse_models(raw) -> dict:
+    models = _parse_json(raw, "MODELS")
+    bad = [
+        name for name, code in models.items() if not isinstance(code, str) or not code
+    ]
+    if bad:
+        raise ValueError(
+            f"Invalid MODELS config: empty model code for {', '.join(bad)}"
+        )
+    return models
+
+
+@functools.lru_cache(maxsize=None)
+def ssm_parameter(name: str) -> str:
+    return boto3.client("ssm").get_parameter(Name=name)["Parameter"]["Value"]
+
+
+def resolve_config(raw, parameter_env: str) -> str:
+    # Inline JSON wins; otherwise read the SSM parameter named by parameter_env.
+    # Always a string, since build_plan is cached on it.
+    if isinstance(raw, dict) and raw:
+        return json.dumps(raw)
+    if raw:
+        return raw
+    parameter = os.environ.get(parameter_env)
+    if parameter:
+        return ssm_parameter(parameter)
+    raise ValueError(f"No config found; set it inline or via {parameter_env}")
+
+
+@functools.lru_cache(maxsize=8)
+def build_plan(raw_locations: str, raw_models: str, base_url: str) -> tuple:
+    # Cached on the raw config strings, so warm invocations skip parsing and
+    # validation entirely and a config change simply misses the cache
+    locations = parse_locations(raw_locations)
+    models = parse_models(raw_models)
+
+    items = [
+        WorkItem(
+            location=location,
+            lat=loc["lat"],
+            lon=loc["lon"],
+            tz=loc["tz"],
+            model_name=model_name,
+            model_code=model_code,
+            url=forecast_url(base_url, model_code, loc["lat"], loc["lon"], loc["tz"]),
+            priority=freshness.model_cycle(model_code)[0],
+            cost=model_cost(model_code),
+        )
+        for location, loc in locations.items()
+        for model_name, model_code in models.items()
+    ]
+    # Stable sort: by priority, then most expensive first so concurrent
+    # workers are not left waiting on one slow page at the end
+    items.sort(key=lambda item: (item.priority, -item.cost))
+    return tuple(items)
+
+
+def work_plan(
+    raw_locations, raw_models, base_url: str, locations=None, models=None
+) -> list[WorkItem]:
+    items = build_plan(
+        resolve_config(raw_locations, "LOCATIONS_PARAMETER"),
+        resolve_config(raw_models, "MODELS_PARAMETER"),
+        base_url,
+    )
+
+    known_locations = {item.location for item in items}
+    known_models = {item.model_name for item in items}
+    for kind, wanted, known in (
+        ("location", locations, known_locations),
+        ("model", models, known_models),
+    ):
+        unknown = set(wanted or []) - known
+        if unknown:
+            raise ValueError(f"Unknown {kind}(s): {', '.join(sorted(unknown))}")
+
+    return [
+        item
+        for item in items
+        if (not locations or item.location in locations)
+        and (not models or item.model_name in models)
+    ]
@@ -0,0 +1,130 @@
+import functools
+import gzip
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import schema
+import storage
+import transform
+
+# Raw extraction payloads are archived as gzipped JSON lines: the first line is
+# metadata (model, location, collected_time, headers), every later line is one
+# table row exactly as the page returned it.
+PAYLOAD_PREFIX = "raw_payloads"
+PAYLOAD_SUFFIX = ".jsonl.gz"
+REPLAY_PREFIX = "replays"
+REPLAY_BATCH_SIZE = 1000
+
+
+class PayloadWriter:
+    def __init__(self, meta: dict):
+        self._buffer = io.BytesIO()
+        # mtime=0 keeps the archive byte-identical for identical payloads
+        self._gzip = gzip.GzipFile(fileobj=self._buffer, mode="wb", mtime=0)
+        self._gzip.write((json.dumps(meta) + "\n").encode())
+
+    def write_rows(self, rows: list[list]) -> None:
+        self._gzip.write("".join(json.dumps(row) + "\n" for row in rows).encode())
+
+    def finish(self) -> bytes:
+        self._gzip.close()
+        return self._buffer.getvalue()
+
+
+def read_payload(body: bytes) -> tuple[dict, list[list]]:
+    lines = gzip.decompress(body).decode().splitlines()
+    return json.loads(lines[0]), [json.loads(line) for line in lines[1:]]
+
+
+def encode_payload(
+    registry: schema.SchemaRegistry, meta: dict, rows: list[list]
+) -> tuple[str, bytes]:
+    # Same checks and encoder as a live collection, so a replay reflects
+    # whatever the current transform code does
+    headers = schema.normalize_headers(meta["headers"])
+    check = registry.check(meta["model"], headers)
+    columns = check.columns if check.conforming else headers
+    writer = transform.ForecastParquetWriter(
+        datetime.fromisoformat(meta["collected_time"]), coerce=check.conforming
+    )
+    for start in range(0, len(rows), REPLAY_BATCH_SIZE):
+        chunk = rows[start : start + REPLAY_BATCH_SIZE]
+        writer.write(transform.rows_to_batch(columns, chunk, check.positions))
+    prefix = "raw_forecasts" if check.conforming else schema.QUARANTINE_PREFIX
+    return prefix, writer.finish()
+
+
+def payload_date(key: str):
+    for part in key.split("/"):
+        if part.startswith("date="):
+            return date.fromisoformat(part[len("date=") :])
+    return None
+
+
+def payload_keys(store: storage.Store, start: date, end: date) -> list[str]:
+    # Walks location=/model=/date= one level at a time and only lists the
+    # objects of date partitions in range, not the whole archive
+    keys = []
+    for location in store.list_prefixes(f"{PAYLOAD_PREFIX}/"):
+        for model in store.list_prefixes(location):
+            for partition in store.list_prefixes(model):
+                day = payload_date(partition)
+                if day and start <= day <= end:
+                    keys.extend(
+                        key
+                        for key in store.list(partition)
+                        if key.endswith(PAYLOAD_SUFFIX)
+                    )
+    return keys
+
+
+def replay_key(payload_key: str, version: str, prefix: str) -> str:
+    partitions = payload_key[len(PAYLOAD_PREFIX) + 1 : -len(PAYLOAD_SUFFIX)]
+    return f"{REPLAY_PREFIX}/version={version}/{prefix}/{partitions}.parquet"
+
+
+@functools.lru_cache(maxsize=None)
+def _worker_context(store_uri: str):
+    # One store and schema registry per worker process, loaded on first use
+    store = storage.open_store(store_uri)
+    registry = schema.SchemaRegistry()
+    registry.load(store)
+    return store, registry
+
+
+def replay_one(store_uri: str, key: str, version: str) -> dict:
+    store, registry = _worker_context(store_uri)
+    meta, rows = read_payload(store.get(key))
+    prefix, body = encode_payload(registry, meta, rows)
+    output = replay_key(key, version, prefix)
+    if body:
+        store.put(output, body)
+    return {"source": key, "key": output, "rows": len(rows), "bytes": len(body)}
+
+
+def replay(
+    store_uri: str, start: date, end: date, version: str, processes: int = None
+) -> list[dict]:
+    # processes=0 replays in this process, which memory:// stores require
+    keys = payload_keys(storage.open_store(store_uri), start, end)
+    if processes == 0 or len(keys) <= 1:
+        return [replay_one(store_uri, key, version) for key in keys]
+
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(keys) // (processes * 4))
+    # Spawned rather than forked: Arrow keeps threads that do not survive fork()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        return list(
+            pool.map(
+                replay_one,
+                [store_uri] * len(keys),
+                keys,
+                [version] * len(keys),
+                chunksize=chunksize,
+            )
+        )
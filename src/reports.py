@@ -0,0 +1,160 @@
+import json
+import math
+import os
+import statistics
+from datetime import datetime, timedelta, timezone
+
+import storage
+
+REPORT_PREFIX = "run_reports"
+
+# Ratios compare against the median of the most recent runs (20 by default,
+# about a day on the hourly freshness schedule); max_duration_s leaves
+# headroom under the 600s Lambda timeout
+DEFAULT_BUDGET = {
+    "p95_page_latency_ratio": 1.5,
+    "duration_per_pair_ratio": 1.5,
+    "max_duration_s": 480.0,
+}
+
+PAIR_FIELDS = [
+    "location",
+    "model",
+    "rows",
+    "bytes",
+    "attempts",
+    "wait_s",
+    "scrape_s",
+    "persist_s",
+    "total_s",
+]
+
+
+def process_tree_rss_mb(root_pid: int = None):
+    # Resident memory of this process and every descendant (Playwright driver
+    # and the browser), read from /proc. None where /proc is unavailable.
+    root_pid = root_pid or os.getpid()
+    try:
+        parents = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # Fields after the parenthesised command name: state ppid ...
+                    fields = f.read().rsplit(")", 1)[1].split()
+                parents[int(entry)] = int(fields[1])
+            except (OSError, IndexError, ValueError):
+                continue
+
+        tree, frontier = {root_pid}, [root_pid]
+        while frontier:
+            pid = frontier.pop()
+            children = [c for c, p in parents.items() if p == pid and c not in tree]
+            tree.update(children)
+            frontier.extend(children)
+
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        total = 0
+        for pid in tree:
+            try:
+                with open(f"/proc/{pid}/statm") as f:
+                    total += int(f.read().split()[1]) * page_size
+            except (OSError, IndexError, ValueError):
+                continue
+        return round(total / 1024 / 1024, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(values: list[float], pct: float) -> float:
+    # Nearest-rank percentile; 0.0 for no values
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def build_report(
+    results: list[dict], started_at: datetime, duration_s: float, **extra
+) -> dict:
+    latencies = [r["scrape_s"] for r in results if r.get("rows")]
+    rss = [r["rss_mb"] for r in results if r.get("rss_mb") is not None]
+    pairs = len(results)
+    return {
+        "started_at": started_at.isoformat(),
+        "duration_s": round(duration_s, 3),
+        "pairs": pairs,
+        "failed_pairs": sum(1 for r in results if not r.get("rows")),
+        "duration_per_pair_s": round(duration_s / pairs, 3) if pairs else 0.0,
+        "page_latency_p50_s": percentile(latencies, 50),
+        "page_latency_p95_s": percentile(latencies, 95),
+        "rows": sum(r.get("rows", 0) for r in results),
+        "bytes": sum(r.get("bytes", 0) for r in results),
+        "retries": sum(max(0, r.get("attempts", 1) - 1) for r in results),
+        "throttle_wait_s": round(sum(r.get("wait_s", 0) for r in results), 3),
+        "peak_rss_mb": max(rss) if rss else None,
+        **extra,
+        "pair_results": [{k: r[k] for k in PAIR_FIELDS if k in r} for r in results],
+    }
+
+
+def report_key(started_at: datetime) -> str:
+    started_at = started_at.astimezone(timezone.utc)
+    return (
+        f"{REPORT_PREFIX}/date={started_at.strftime('%Y-%m-%d')}/"
+        f"{started_at.strftime('%Y-%m-%d_%H-%M-%SZ')}.json"
+    )
+
+
+def write_report(store: storage.Store, report: dict) -> str:
+    key = report_key(datetime.fromisoformat(report["started_at"]))
+    store.put(key, json.dumps(report, separators=(",", ":")).encode())
+    return key
+
+
+def load_recent_reports(
+    store: storage.Store, now: datetime, days: int = 7, limit: int = 20
+) -> list[dict]:
+    # The limit newest reports from the last `days` days. On the hourly
+    # schedule the limit is what binds: the default 20 cover about 20 hours.
+    # Lists one date= partition per day so the cost stays flat as history grows
+    keys = []
+    for offset in range(days):
+        day = (now - timedelta(days=offset)).strftime("%Y-%m-%d")
+        keys.extend(store.list(f"{REPORT_PREFIX}/date={day}/"))
+    return [json.loads(store.get(key)) for key in sorted(keys)[-limit:]]
+
+
+def load_budget() -> dict:
+    return {**DEFAULT_BUDGET, **json.loads(os.environ.get("PERF_BUDGET") or "{}")}
+
+
+def check_budget(report: dict, history: list[dict], budget: dict = None) -> list[str]:
+    budget = budget or load_budget()
+    problems = []
+
+    if report["duration_s"] > budget["max_duration_s"]:
+        problems.append(
+            f"duration {report['duration_s']}s exceeds "
+            f"max_duration_s {budget['max_duration_s']}s"
+        )
+
+    # Runs that collected nothing say nothing about page latency
+    history = [h for h in history if h.get("pairs") and h.get("rows")]
+    if not history or not report.get("pairs"):
+        return problems
+
+    for metric, ratio_key in (
+        ("page_latency_p95_s", "p95_page_latency_ratio"),
+        ("duration_per_pair_s", "duration_per_pair_ratio"),
+    ):
+        baseline = statistics.median(h[metric] for h in history)
+        limit = baseline * budget[ratio_key]
+        if baseline and report[metric] > limit:
+            problems.append(
+                f"{metric} {report[metric]} regressed past {round(limit, 3)} "
+                f"({budget[ratio_key]}x median {round(baseline, 3)} "
+                f"over {len(history)} runs)"
+            )
+    return problems
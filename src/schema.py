@@ -0,0 +1,185 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+
+import storage
+
+FORECAST_TIME = "forecast_time"
+NUMERIC_COLUMNS = ["tmp", "dpt", "apcp", "slp", "rqp", "sqp", "fqp", "iqp", "tmp850"]
+INT_COLUMNS = ["rh", "ws", "wd", "wg", "cloud", "ws925", "wd925", "ws850"]
+# Columns we know how to type. A model's first table may also carry others
+# (date, time, ptype, ...), which join its baseline and are kept as strings;
+# a declared column can join a baseline later (e.g. the toggle click that
+# would have shown it timed out on the first table), anything else is drift.
+DECLARED_COLUMNS = {FORECAST_TIME, *NUMERIC_COLUMNS, *INT_COLUMNS}
+
+# Header renames seen upstream, mapped back onto the names our tables use
+HEADER_ALIASES = {
+    "datetime": FORECAST_TIME,
+    "date/time": FORECAST_TIME,
+    "temp": "tmp",
+    "dewpoint": "dpt",
+    "dew point": "dpt",
+    "precip": "apcp",
+    "pcpn": "apcp",
+    "gust": "wg",
+    "clouds": "cloud",
+    "pressure": "slp",
+}
+
+STATE_KEY = "schema/fingerprints.json"
+QUARANTINE_PREFIX = "quarantine"
+METRIC_NAMESPACE = "WeatherCollector"
+
+
+def fingerprint(headers: list[str]) -> str:
+    return hashlib.sha1("\x1f".join(headers).encode()).hexdigest()[:12]
+
+
+def normalize_headers(raw_headers: list[str]) -> list[str]:
+    # Header row as the page returned it -> the names a table is checked with.
+    # The first column is always the forecast time, whatever the page calls it.
+    headers = [h.lower().strip() for h in raw_headers]
+    if headers:
+        headers[0] = FORECAST_TIME
+    return headers
+
+
+def canonical_name(header: str) -> str:
+    name = header.lower().strip()
+    return HEADER_ALIASES.get(name, name)
+
+
+@dataclass(frozen=True)
+class SchemaCheck:
+    model: str
+    fingerprint: str
+    # "new" (baseline learned), "ok", "remapped" (renamed, reordered or with
+    # missing columns filled with nulls) or "drift"
+    status: str
+    columns: list[str]
+    renames: dict = field(default_factory=dict)
+    missing: list[str] = field(default_factory=list)
+    unexpected: list[str] = field(default_factory=list)
+    # Index in the header row of each entry in columns, None for a missing
+    # column; positions=None means the header row is used as-is
+    positions: list = None
+
+    @property
+    def conforming(self) -> bool:
+        return self.status != "drift"
+
+
+class SchemaRegistry:
+    # Expected columns per model plus a cache of every header tuple already
+    # checked, so repeat tables for a model validate with one dict lookup.
+    def __init__(self, baselines: dict = None):
+        self.baselines = dict(baselines or {})
+        self.dirty = False
+        self._checks: dict[tuple, SchemaCheck] = {}
+
+    def load(self, store: storage.Store) -> None:
+        try:
+            state = json.loads(store.get(STATE_KEY))
+        except KeyError:
+            return
+        # The stored file wins, so edits to it reach warm containers too
+        for model, entry in state.items():
+            self.baselines[model] = entry["columns"]
+        self._checks.clear()
+
+    def save(self, store: storage.Store) -> None:
+        if not self.dirty:
+            return
+        state = {
+            model: {"columns": columns}
+            for model, columns in sorted(self.baselines.items())
+        }
+        store.put(STATE_KEY, json.dumps(state, indent=2).encode())
+        self.dirty = False
+
+    def check(self, model: str, headers: list[str]) -> SchemaCheck:
+        cache_key = (model, tuple(headers))
+        cached = self._checks.get(cache_key)
+        if cached is not None:
+            return cached
+
+        columns = [canonical_name(h) for h in headers]
+        renames = {h: c for h, c in zip(headers, columns) if h != c}
+        baseline = self.baselines.get(model)
+        result = dict(
+            model=model, fingerprint=fingerprint(list(headers)), renames=renames
+        )
+
+        # Without a baseline every column is learned, declared or not
+        unexpected = (
+            sorted(set(columns) - DECLARED_COLUMNS - set(baseline))
+            if baseline is not None
+            else []
+        )
+        if (
+            len(set(columns)) != len(columns)
+            or FORECAST_TIME not in columns
+            or unexpected
+        ):
+            check = SchemaCheck(
+                status="drift",
+                columns=columns,
+                missing=sorted(set(baseline or []) - set(columns)),
+                unexpected=unexpected,
+                **result,
+            )
+        elif baseline is None:
+            self.baselines[model] = columns
+            self.dirty = True
+            check = SchemaCheck(status="new", columns=columns, **result)
+        else:
+            added = [c for c in columns if c not in baseline]
+            if added:
+                # A declared column the baseline lacks, e.g. it was learned
+                # from a table whose toggle click failed: extend the baseline
+                baseline = self.baselines[model] = [*baseline, *added]
+                self.dirty = True
+            status = "ok" if columns == baseline and not renames else "remapped"
+            check = SchemaCheck(
+                status=status,
+                columns=list(baseline),
+                missing=[c for c in baseline if c not in columns],
+                positions=None
+                if status == "ok"
+                else [columns.index(c) if c in columns else None for c in baseline],
+                **result,
+            )
+
+        self._checks[cache_key] = check
+        return check
+
+
+def emit_drift_metric(check: SchemaCheck, location: str) -> None:
+    # CloudWatch embedded metric format: Lambda turns this log line into a
+    # SchemaDrift metric without an extra API call
+    print(
+        json.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": METRIC_NAMESPACE,
+                            "Dimensions": [["model", "status"]],
+                            "Metrics": [{"Name": "SchemaDrift", "Unit": "Count"}],
+                        }
+                    ],
+                },
+                "model": check.model,
+                "status": check.status,
+                "location": location,
+                "fingerprint": check.fingerprint,
+                "missing": check.missing,
+                "unexpected": check.unexpected,
+                "renames": check.renames,
+                "SchemaDrift": 1,
+            }
+        )
+    )
@@ -0,0 +1,224 @@
+import abc
+import os
+import tempfile
+import threading
+from urllib.parse import urlparse
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Backends are picked from a URI so local runs, tests and benchmarks can use the
+# same key layout as production:
+#   s3://bucket/optional/prefix
+#   file:///data/weather
+#   memory://name
+
+
+class Store(abc.ABC):
+    uri = ""
+
+    @abc.abstractmethod
+    def put(self, key: str, body: bytes) -> None: ...
+
+    @abc.abstractmethod
+    def get(self, key: str) -> bytes:
+        # Missing keys raise KeyError on every backend
+        ...
+
+    @abc.abstractmethod
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        # One level of "directories" under prefix (which ends in "/"), each
+        # ending in "/", without listing the objects below them
+        ...
+
+    @abc.abstractmethod
+    def list(self, prefix: str = "") -> list[str]: ...
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.get(key)
+            return True
+        except KeyError:
+            return False
+
+
+class S3Store(Store):
+    def __init__(self, bucket: str, prefix: str = "", client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.uri = f"s3://{bucket}/{self.prefix}".rstrip("/")
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = boto3.client("s3")
+        return self._client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put(self, key: str, body: bytes) -> None:
+        # S3 PUTs are atomic: readers see the old object or the new one
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=body)
+
+    def get(self, key: str) -> bytes:
+        try:
+            resp = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise KeyError(key) from e
+            raise
+        return resp["Body"].read()
+
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        prefixes = []
+        for page in paginator.paginate(
+            Bucket=self.bucket, Prefix=self._key(prefix), Delimiter="/"
+        ):
+            prefixes.extend(p["Prefix"][strip:] for p in page.get("CommonPrefixes", []))
+        return sorted(prefixes)
+
+    def list(self, prefix: str = "") -> list[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        keys = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            keys.extend(obj["Key"][strip:] for obj in page.get("Contents", []))
+        return sorted(keys)
+
+
+class LocalStore(Store):
+    TMP_PREFIX = ".tmp-"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self.uri = f"file://{self.root}"
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Key {key!r} escapes store root {self.root}")
+        return path
+
+    def put(self, key: str, body: bytes) -> None:
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temp file in the same directory then rename over the
+        # target, so readers never observe a partially written object.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=self.TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError as e:
+            raise KeyError(key) from e
+
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        top = self._path(prefix) if prefix.strip("/") else self.root
+        try:
+            names = os.listdir(top)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            f"{prefix}{name}/"
+            for name in names
+            if os.path.isdir(os.path.join(top, name))
+        )
+
+    def list(self, prefix: str = "") -> list[str]:
+        # Only walk the directory the prefix lives in, not the whole root
+        directory = prefix if prefix.endswith("/") else os.path.dirname(prefix)
+        top = self._path(directory) if directory.strip("/") else self.root
+        keys = []
+        for dirpath, _, filenames in os.walk(top):
+            for name in filenames:
+                if name.startswith(self.TMP_PREFIX):
+                    continue
+                rel = os.path.relpath(os.path.join(dirpath, name), self.root)
+                key = rel.replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+
+class MemoryStore(Store):
+    def __init__(self, name: str = ""):
+        self.uri = f"memory://{name}"
+        self._objects: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, body: bytes) -> None:
+        with self._lock:
+            self._objects[key] = bytes(body)
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            return self._objects[key]
+
+    def list_prefixes(self, prefix: str = "") -> list[str]:
+        with self._lock:
+            return sorted(
+                {
+                    prefix + k[len(prefix) :].split("/", 1)[0] + "/"
+                    for k in self._objects
+                    if k.startswith(prefix) and "/" in k[len(prefix) :]
+                }
+            )
+
+    def list(self, prefix: str = "") -> list[str]:
+        with self._lock:
+            return sorted(k for k in self._objects if k.startswith(prefix))
+
+
+# memory:// stores live for the life of the process so every open_store call
+# with the same name sees the same objects
+_MEMORY_STORES: dict[str, MemoryStore] = {}
+_MEMORY_LOCK = threading.Lock()
+
+
+def open_store(uri: str) -> Store:
+    parsed = urlparse(uri)
+    if parsed.scheme == "s3":
+        if not parsed.netloc:
+            raise ValueError(f"Missing bucket in storage URI {uri!r}")
+        return S3Store(parsed.netloc, parsed.path)
+    if parsed.scheme == "file":
+        return LocalStore(parsed.netloc + parsed.path)
+    if parsed.scheme == "memory":
+        name = parsed.netloc + parsed.path
+        with _MEMORY_LOCK:
+            if name not in _MEMORY_STORES:
+                _MEMORY_STORES[name] = MemoryStore(name)
+            return _MEMORY_STORES[name]
+    raise ValueError(f"Unsupported storage URI {uri!r}")
+
+
+def default_store_uri(fallback: str = None) -> str:
+    # fallback is used instead of raising when nothing is configured
+    if os.environ.get("STORAGE_URI"):
+        return os.environ["STORAGE_URI"]
+    if os.environ.get("BUCKET"):
+        return f"s3://{os.environ['BUCKET']}"
+    if fallback:
+        return fallback
+    raise ValueError("No storage configured; set STORAGE_URI or BUCKET")
+
+
+def default_store(fallback: str = None) -> Store:
+    return open_store(default_store_uri(fallback))
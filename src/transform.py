@@ -0,0 +1,113 @@
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+import schema
+
+# Anything else becomes null, matching pd.to_numeric(errors="coerce")
+_NUMBER_PATTERN = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+
+PARQUET_OPTIONS = dict(
+    coerce_timestamps="ms",
+    allow_truncated_timestamps=True,
+    use_deprecated_int96_timestamps=False,
+)
+
+
+def _is_text(arr) -> bool:
+    return pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)
+
+
+def _to_number(arr, target: pa.DataType):
+    if _is_text(arr):
+        valid = pc.match_substring_regex(arr, _NUMBER_PATTERN)
+        arr = pc.if_else(valid, pc.utf8_trim_whitespace(arr), pa.scalar(None, arr.type))
+        arr = pc.cast(arr, pa.float64())
+    return pc.cast(arr, target, safe=False)
+
+
+def _to_timestamp(arr):
+    # SpotWX time formats vary by model, so let pandas infer them per column
+    values = pd.to_datetime(arr.to_pandas(), utc=True).dt.tz_localize(None)
+    return pa.array(values).cast(pa.timestamp("ms"), safe=False)
+
+
+def rows_to_batch(
+    columns: list[str], rows: list[list], positions=None
+) -> pa.RecordBatch:
+    # positions[i] is the index in each row of columns[i], or None for a
+    # column the page did not have (all nulls); defaults to identity
+    positions = positions or range(len(columns))
+    present = [i for i in positions if i is not None]
+    width = len(present) and max(present) + 1
+    for row in rows:
+        if len(row) < width:
+            raise ValueError(f"Row has {len(row)} cells, expected at least {width}")
+    arrays = [
+        pa.nulls(len(rows), pa.string())
+        if i is None
+        else pa.array([row[i] for row in rows], pa.string())
+        for i in positions
+    ]
+    return pa.RecordBatch.from_arrays(arrays, names=list(columns))
+
+
+def coerce_batch(batch, collected_time: datetime) -> pa.Table:
+    # String batch in, typed table out; the schema depends only on column names
+    names, arrays = [], []
+    for name, arr in zip(batch.column_names, batch.columns):
+        if name == schema.FORECAST_TIME:
+            arr = _to_timestamp(arr)
+        elif name in schema.NUMERIC_COLUMNS:
+            arr = _to_number(arr, pa.float32())
+        elif name in schema.INT_COLUMNS:
+            arr = _to_number(arr, pa.int32())
+        elif pa.types.is_large_string(arr.type):
+            arr = pc.cast(arr, pa.string())
+        names.append(name)
+        arrays.append(arr)
+
+    names.append("collected_time")
+    arrays.append(
+        pa.array([collected_time] * batch.num_rows, pa.timestamp("us", tz="UTC"))
+    )
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def stringify_batch(batch, collected_time: datetime) -> pa.Table:
+    # Quarantined tables keep every cell verbatim
+    arrays = [pc.cast(arr, pa.string()) for arr in batch.columns]
+    arrays.append(
+        pa.array([collected_time] * batch.num_rows, pa.timestamp("us", tz="UTC"))
+    )
+    return pa.Table.from_arrays(arrays, names=[*batch.column_names, "collected_time"])
+
+
+class ForecastParquetWriter:
+    # Streams string batches into one Parquet object, one row group per batch,
+    # so only the current batch is ever held in Python/Arrow form.
+    def __init__(self, collected_time: datetime, coerce: bool = True):
+        self.collected_time = collected_time
+        self.coerce = coerce
+        self.rows = 0
+        self._sink = pa.BufferOutputStream()
+        self._writer = None
+
+    def write(self, batch) -> None:
+        if self.coerce:
+            table = coerce_batch(batch, self.collected_time)
+        else:
+            table = stringify_batch(batch, self.collected_time)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._sink, table.schema, **PARQUET_OPTIONS)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def finish(self) -> bytes:
+        if self._writer is None:
+            return b""
+        self._writer.close()
+        return self._sink.getvalue().to_pybytes()
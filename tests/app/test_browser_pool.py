@@ -0,0 +1,139 @@
+import os
+import types
+
+import pytest
+
+import src.browser_pool as browser_pool
+
+
+class FakeResponse:
+    def __init__(self, status=200, headers=None, body=b"console.log(1)"):
+        self.status = status
+        self.headers = headers or {
+            "content-type": "application/javascript",
+            "content-encoding": "gzip",
+        }
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type="script", method="GET", response=None):
+        self.request = types.SimpleNamespace(
+            url=url, resource_type=resource_type, method=method
+        )
+        self.response = response or FakeResponse()
+        self.fetched = 0
+        self.continued = False
+        self.fulfilled = None
+
+    async def fetch(self):
+        self.fetched += 1
+        return self.response
+
+    async def continue_(self):
+        self.continued = True
+
+    async def fulfill(self, **kwargs):
+        self.fulfilled = kwargs
+
+
+@pytest.mark.asyncio
+async def test_asset_is_fetched_once_then_served_from_disk(tmp_path):
+    cache = browser_pool.AssetCache(str(tmp_path))
+    url = "https://example.com/js/dataTables.min.js"
+
+    first = FakeRoute(url)
+    await cache.handle_route(first)
+    assert first.fetched == 1
+    assert first.fulfilled["body"] == b"console.log(1)"
+
+    # A second cache instance (a new invocation in a warm container) hits disk
+    warm = browser_pool.AssetCache(str(tmp_path))
+    second = FakeRoute(url)
+    await warm.handle_route(second)
+    assert second.fetched == 0
+    assert second.fulfilled["body"] == b"console.log(1)"
+    assert second.fulfilled["headers"] == {"content-type": "application/javascript"}
+    assert (cache.misses, warm.hits) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_documents_and_non_get_requests_pass_through(tmp_path):
+    cache = browser_pool.AssetCache(str(tmp_path))
+    document = FakeRoute("https://example.com/forecast", resource_type="document")
+    post = FakeRoute("https://example.com/app.js", method="POST")
+
+    await cache.handle_route(document)
+    await cache.handle_route(post)
+
+    assert document.continued and post.continued
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_errors_and_no_store_responses_are_not_cached(tmp_path):
+    cache = browser_pool.AssetCache(str(tmp_path))
+    await cache.handle_route(
+        FakeRoute("https://e.com/a.js", response=FakeResponse(404))
+    )
+    await cache.handle_route(
+        FakeRoute(
+            "https://e.com/b.js",
+            response=FakeResponse(headers={"cache-control": "no-store"}),
+        )
+    )
+    assert os.listdir(tmp_path) == []
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = browser_pool.AssetCache(str(tmp_path), ttl_s=0)
+    cache.put("https://e.com/a.css", 200, {}, b"body{}")
+    old = os.path.getmtime(cache._path("https://e.com/a.css")) - 10
+    os.utime(cache._path("https://e.com/a.css"), (old, old))
+    assert cache.get("https://e.com/a.css") is None
+
+
+class FakeContext:
+    def __init__(self):
+        self.routes = []
+        self.closed = False
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+        self.kwargs = []
+
+    async def new_context(self, **kwargs):
+        self.kwargs.append(kwargs)
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+
+@pytest.mark.asyncio
+async def test_context_pool_hands_out_and_reclaims_contexts(tmp_path):
+    browser = FakeBrowser()
+    cache = browser_pool.AssetCache(str(tmp_path))
+    pool = await browser_pool.ContextPool(browser, 2, cache, user_agent="ua").start()
+
+    assert len(browser.contexts) == 2
+    assert all(k == {"user_agent": "ua"} for k in browser.kwargs)
+    assert all(c.routes == [("**/*", cache.handle_route)] for c in browser.contexts)
+
+    async with pool.acquire() as a:
+        async with pool.acquire() as b:
+            assert a is not b
+    async with pool.acquire() as again:
+        assert again in (a, b)
+
+    await pool.close()
+    assert all(c.closed for c in browser.contexts)
@@ -2,11 +2,10 @@ import asyncio
 import json
 import io
 import types
-import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import src.collector as mod
 
@@ -28,11 +27,15 @@ def env(monkeypatch):
     monkeypatch.setenv("MODELS", json.dumps(models))
     monkeypatch.setenv("FORECASTS_URL", "https://example.com/spotwx")
     monkeypatch.setenv("BUCKET", "test-bucket")
+    monkeypatch.setattr(mod, "ARCHIVE_RAW_PAYLOADS", False)
+    monkeypatch.setattr(mod, "ENCODE_PROCESSES", "0")
+    monkeypatch.delenv("STORAGE_URI", raising=False)
 
     # Reload module env vars (only needed if values were imported at import-time)
     mod.LOCATIONS = json.dumps(locations)
     mod.MODELS = json.dumps(models)
     mod.FORECASTS_URL = "https://example.com/spotwx"
+    monkeypatch.setattr(mod, "SCHEMAS", mod.schema.SchemaRegistry())
 
     return
 
@@ -82,23 +85,35 @@ class DummyPage:
     async def goto(self, url, timeout=20000, wait_until="domcontentloaded"):
         return
 
+    async def close(self):
+        return
+
     @property
     def first(self):
         return self
 
-    async def evaluate(self, script):
-        if not self._table_visible:
-            return {"headers": [], "rows": []}
-        return {"headers": self._headers, "rows": self._rows}
+    async def evaluate(self, script, arg=None):
+        # Header probe takes no argument; row batches are fetched by [start, end]
+        if arg is None:
+            if not self._table_visible:
+                return {"headers": [], "count": 0}
+            return {"headers": self._headers, "count": len(self._rows)}
+        start, end = arg
+        self.batches_fetched = getattr(self, "batches_fetched", 0) + 1
+        return self._rows[start:end]
 
 
 class DummyContext:
     def __init__(self, page):
         self._page = page
+        self.routes = []
 
     async def new_page(self):
         return self._page
 
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
     async def close(self):
         return
 
@@ -106,9 +121,11 @@ class DummyContext:
 class DummyBrowser:
     def __init__(self, page):
         self._page = page
+        self.contexts = []
 
     async def new_context(self, user_agent=None, viewport=None):
-        return DummyContext(self._page)
+        self.contexts.append(DummyContext(self._page))
+        return self.contexts[-1]
 
     async def close(self):
         return
@@ -173,7 +190,7 @@ def fake_s3(monkeypatch):
         assert name == "s3"
         return FakeS3()
 
-    monkeypatch.setattr(mod, "boto3", types.SimpleNamespace(client=fake_client))
+    monkeypatch.setattr(mod.storage, "boto3", types.SimpleNamespace(client=fake_client))
     return calls
 
 
@@ -194,42 +211,44 @@ async def test_enable_extra_columns_clicks_some(monkeypatch):
     assert len(timeouts) >= 1
 
 
-# ---------------------------- Tests: scrape_spotwx_table ----------------------
+# ---------------------------- Tests: stream_spotwx_table ----------------------
 
 
 @pytest.mark.asyncio
-async def test_scrape_spotwx_table_happy_path(monkeypatch):
+async def test_stream_spotwx_table_happy_path():
     page = DummyPage()
-    df = await mod.scrape_spotwx_table(page, "https://example.com/x", "NAM")
-    assert not df.empty
+    store = mod.storage.MemoryStore()
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    assert written["rows"] == 2
+    assert store.list("raw_forecasts/") == [written["key"]]
+    assert written["bytes"] == len(store.get(written["key"]))
+    table = pq.read_table(io.BytesIO(store.get(written["key"])))
     # Header normalization
-    assert "forecast_time" in df.columns
-    assert "tmp" in df.columns
-    assert len(df) == 2
+    assert table.column_names == ["forecast_time", "tmp", "rh", "collected_time"]
+    assert table.num_rows == 2
 
 
 @pytest.mark.asyncio
-async def test_scrape_spotwx_table_no_table(monkeypatch):
+async def test_stream_spotwx_table_no_table(fake_s3):
     page = DummyPage()
     # Force no rows back from evaluate
     page._table_visible = False
-    df = await mod.scrape_spotwx_table(page, "https://example.com/x", "NAM")
-    assert df.empty
-
+    store = mod.storage.default_store()
 
-# -------------------------- Tests: persist_forecast_data ----------------------
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
 
+    assert written == {"rows": 0, "bytes": 0, "key": None, "quarantined": False}
+    assert fake_s3 == []
 
-def test_persist_forecast_data_writes_parquet(fake_s3, monkeypatch):
-    # Build a minimal DataFrame with expected columns
-    df = pd.DataFrame(
-        {
-            "forecast_time": ["2025-08-08 12:00Z", "2025-08-08 15:00Z"],
-            "tmp": ["15.2", "17.1"],
-            "rh": ["70", "60"],
-        }
-    )
 
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_writes_parquet_to_s3(fake_s3, monkeypatch):
     # Freeze time to a known collected_time for deterministic key
     fixed_dt = datetime(2025, 8, 8, 22, 16, 24, tzinfo=timezone.utc)
     monkeypatch.setattr(
@@ -243,71 +262,422 @@ def test_persist_forecast_data_writes_parquet(fake_s3, monkeypatch):
         ),
     )
 
-    mod.persist_forecast_data(df.copy(), "NAM", "sky_pilot")
+    await mod.stream_spotwx_table(
+        DummyPage(),
+        "https://example.com/x",
+        "NAM",
+        "sky_pilot",
+        mod.storage.default_store(),
+    )
 
     assert len(fake_s3) == 1
     call = fake_s3[0]
     assert call["Bucket"] == "test-bucket"
     # Key shape: raw_forecasts/location=.../model=.../date=YYYY-MM-DD/YYYY-MM-DD_HH-MM-SSZ.parquet
-    assert call["Key"].startswith(
+    assert call["Key"] == (
         "raw_forecasts/location=sky_pilot/model=nam/date=2025-08-08/"
+        "2025-08-08_22-16-24Z.parquet"
     )
-    assert call["Key"].endswith(".parquet")
 
     # Validate the parquet buffer is readable and schema reasonable
-    buf = io.BytesIO(call["Body"])
-    table = pq.read_table(buf)
-    cols = table.column_names
+    table = pq.read_table(io.BytesIO(call["Body"]))
     for expected in ["forecast_time", "tmp", "rh", "collected_time"]:
-        assert expected in cols
+        assert expected in table.column_names
 
     # forecast_time should be tz-naive (stored as timestamp[ms] w/o tz)
     assert pa.types.is_timestamp(table.schema.field("forecast_time").type)
 
 
-def test_persist_forecast_data_handles_empty_df(fake_s3):
-    mod.persist_forecast_data(pd.DataFrame(), "NAM", "sky_pilot")
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_remaps_renamed_and_reordered_columns(capsys):
+    page = DummyPage()
+    page._headers = ["Time", "rh", "temp"]
+    page._rows = [["2025-08-08 12:00Z", "70", "15.2"]]
+    store = mod.storage.MemoryStore("schema-remap")
+    mod.SCHEMAS.baselines["NAM"] = ["forecast_time", "tmp", "rh"]
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    assert written["key"].startswith("raw_forecasts/")
+    table = pq.read_table(io.BytesIO(store.get(written["key"])))
+    assert table.column_names == ["forecast_time", "tmp", "rh", "collected_time"]
+    assert table.column("tmp").to_pylist() == pytest.approx([15.2])
+    assert '"status": "remapped"' in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_quarantines_drifted_tables(capsys):
+    page = DummyPage()
+    page._headers = ["Time", "mystery"]
+    page._rows = [["2025-08-08 12:00Z", "?"]]
+    store = mod.storage.MemoryStore("schema-drift")
+    mod.SCHEMAS.baselines["NAM"] = ["forecast_time", "tmp", "rh"]
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    assert written["quarantined"] is True
+    assert written["key"].startswith("quarantine/location=sky_pilot/model=nam/")
+    assert store.list("raw_forecasts/") == []
+    out = capsys.readouterr().out
+    assert '"SchemaDrift": 1' in out
+    assert '"unexpected": ["mystery"]' in out
+
+
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_writes_nulls_for_missing_columns(capsys):
+    page = DummyPage()
+    page._headers = ["Time", "rh"]
+    page._rows = [["2025-08-08 12:00Z", "70"]]
+    mod.SCHEMAS.baselines["NAM"] = ["forecast_time", "tmp", "rh"]
+    store = mod.storage.MemoryStore("schema-missing")
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    assert written["quarantined"] is False
+    assert written["key"].startswith("raw_forecasts/")
+    table = pq.read_table(io.BytesIO(store.get(written["key"])))
+    assert table.column_names == ["forecast_time", "tmp", "rh", "collected_time"]
+    assert table.column("tmp").to_pylist() == [None]
+    assert table.column("rh").to_pylist() == [70]
+    assert "Missing columns for NAM / sky_pilot: ['tmp']" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_handles_empty_table(fake_s3):
+    page = DummyPage()
+    page._rows = []
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", mod.storage.default_store()
+    )
+
+    assert written["rows"] == 0
     assert fake_s3 == []
 
 
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_keeps_undeclared_columns_as_strings():
+    page = DummyPage()
+    page._headers = ["DATETIME", "DATE", "TMP", "PTYPE"]
+    page._rows = [["2025-08-08 12:00Z", "2025/08/08", "15.2", "RA"]]
+    store = mod.storage.MemoryStore("schema-undeclared")
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    assert written["key"].startswith("raw_forecasts/")
+    table = pq.read_table(io.BytesIO(store.get(written["key"])))
+    assert table.column("date").to_pylist() == ["2025/08/08"]
+    assert table.column("ptype").to_pylist() == ["RA"]
+    assert table.schema.field("tmp").type == pa.float32()
+
+
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_archives_raw_payload():
+    page = DummyPage()
+    store = mod.storage.MemoryStore("archive")
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store, archive_raw=True
+    )
+
+    archive_key = written["archive_key"]
+    assert archive_key.startswith("raw_payloads/location=sky_pilot/model=nam/")
+    assert (
+        archive_key[: -len(".jsonl.gz")].split("/")[-1]
+        == (written["key"][: -len(".parquet")].split("/")[-1])
+    )
+    meta, rows = mod.replay.read_payload(store.get(archive_key))
+    assert meta["headers"] == ["Time", "tmp", "rh"]
+    assert meta["model"] == "NAM"
+    assert rows == page._rows
+
+
 # ------------------------------- Tests: run_job --------------------------------
 
 
 @pytest.mark.asyncio
-async def test_run_job_invokes_scrape_and_persist(monkeypatch, fake_playwright):
-    # Track calls to persist_forecast_data
+async def test_run_job_invokes_stream_per_pair(monkeypatch, fake_playwright):
+    # Track calls to stream_spotwx_table
     calls = []
 
-    def fake_persist(df, model_name, location):
-        calls.append((model_name, location, len(df)))
+    async def fake_stream(page, url, model_name, location, store, **kwargs):
+        calls.append((model_name, location))
+        return {"rows": 1, "bytes": 10, "key": "k", "quarantined": False}
 
-    # Return fixed DF from scraper
-    async def fake_scrape(page, url, model_name):
-        return pd.DataFrame(
-            {"forecast_time": ["2025-08-08 12:00Z"], "tmp": ["10.0"], "rh": ["50"]}
-        )
-
-    monkeypatch.setattr(mod, "persist_forecast_data", fake_persist)
-    monkeypatch.setattr(mod, "scrape_spotwx_table", fake_scrape)
+    monkeypatch.setattr(mod, "stream_spotwx_table", fake_stream)
 
     # Speed up sleeps
     monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
     monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    # Schema baselines are loaded from the default store
+    monkeypatch.setenv("STORAGE_URI", "memory://run-job")
 
-    await mod.run_job()
+    results = await mod.run_job()
 
-    # We have 1 location x 2 models = 2 persist calls
+    # We have 1 location x 2 models = 2 streamed pairs
     assert len(calls) == 2
     assert {c[0] for c in calls} == {"NAM", "ICON"}
     assert {c[1] for c in calls} == {"sky_pilot"}
-    assert all(c[2] == 1 for c in calls)  # 1-row DF each
+    assert all(r["rows"] == 1 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_writes_in_batches(monkeypatch):
+    page = DummyPage()
+    page._rows = [[f"2025-08-08 {h:02d}:00Z", f"{h}.5", str(h)] for h in range(7)]
+    monkeypatch.setattr(mod, "ROW_BATCH_SIZE", 3)
+    store = mod.storage.MemoryStore("stream")
+
+    written = await mod.stream_spotwx_table(
+        page, "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    assert page.batches_fetched == 3
+    assert written["rows"] == 7
+    parquet = pq.ParquetFile(io.BytesIO(store.get(written["key"])))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column_names == ["forecast_time", "tmp", "rh", "collected_time"]
+    assert table.schema.field("tmp").type == pa.float32()
+    assert table.schema.field("rh").type == pa.int32()
+    assert table.column("tmp").to_pylist()[-1] == 6.5
+
+
+@pytest.mark.asyncio
+async def test_stream_spotwx_table_encodes_in_worker_process():
+    store = mod.storage.MemoryStore("encode")
+    in_thread = await mod.stream_spotwx_table(
+        DummyPage(), "https://example.com/x", "NAM", "sky_pilot", store
+    )
+
+    with mod.encoding.TransformExecutor(1) as executor:
+        pooled = await mod.stream_spotwx_table(
+            DummyPage(),
+            "https://example.com/x",
+            "NAM",
+            "sky_pilot",
+            store,
+            executor=executor,
+        )
+
+    assert executor.processes == 1
+    assert pooled["rows"] == in_thread["rows"] == 2
+    pooled_table = pq.read_table(io.BytesIO(store.get(pooled["key"])))
+    in_thread_table = pq.read_table(io.BytesIO(store.get(in_thread["key"])))
+    assert pooled_table.schema == in_thread_table.schema
+    assert pooled_table.column("tmp").to_pylist() == (
+        in_thread_table.column("tmp").to_pylist()
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("processes", [0, 1])
+async def test_stream_spotwx_table_skips_unencodable_pair(processes, capsys):
+    page = DummyPage()
+    page._rows = [["not a time", "15.2", "70"]]
+    store = mod.storage.MemoryStore(f"bad-row-{processes}")
+
+    with mod.encoding.TransformExecutor(processes) as executor:
+        written = await mod.stream_spotwx_table(
+            page,
+            "https://example.com/x",
+            "NAM",
+            "sky_pilot",
+            store,
+            executor=executor,
+        )
+
+    assert written == {"rows": 0, "bytes": 0, "key": None, "quarantined": False}
+    assert store.list("raw_forecasts/") == []
+
+
+@pytest.mark.asyncio
+async def test_run_job_subset_concurrency_and_dry_run(monkeypatch, fake_playwright):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore()
+
+    results = await mod.run_job(
+        store=store, models=["ICON"], concurrency=4, dry_run=True
+    )
+
+    assert [(r["location"], r["model"]) for r in results] == [("sky_pilot", "ICON")]
+    assert results[0]["rows"] == 2
+    assert results[0]["bytes"] > 0
+    assert results[0]["key"] is None
+    assert store.list() == []
+
+
+@pytest.mark.asyncio
+async def test_run_job_dry_run_never_reads_the_store(monkeypatch, fake_playwright):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+
+    class UntouchableStore(mod.storage.MemoryStore):
+        def get(self, key):
+            raise AssertionError(f"dry run read {key}")
+
+        def put(self, key, body):
+            raise AssertionError(f"dry run wrote {key}")
+
+    results = await mod.run_job(store=UntouchableStore(), dry_run=True)
+
+    assert all(r["rows"] == 2 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_run_job_persists_every_pair_concurrently(monkeypatch, fake_playwright):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore()
+
+    results = await mod.run_job(store=store, concurrency=2, rate_limit=1000)
+
+    assert {r["model"] for r in results} == {"NAM", "ICON"}
+    assert sorted(r["key"] for r in results) == store.list("raw_forecasts/")
+
+
+@pytest.mark.asyncio
+async def test_run_job_refreshes_latest_snapshot(monkeypatch, fake_playwright):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore("latest")
+
+    await mod.run_job(store=store, concurrency=2)
+
+    assert store.list("latest/") == [
+        "latest/all.parquet",
+        "latest/location=sky_pilot/model=icon.parquet",
+        "latest/location=sky_pilot/model=nam.parquet",
+    ]
+    table = mod.latest.read_latest(store)
+    assert table.num_rows == 4
+    assert sorted(set(table.column("model").to_pylist())) == ["icon", "nam"]
+
+
+@pytest.mark.asyncio
+async def test_run_job_survives_latest_snapshot_errors(
+    monkeypatch, fake_playwright, capsys
+):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore("latest-errors")
+
+    def boom(self, *args):
+        raise pa.ArrowTypeError("Unable to merge")
+
+    monkeypatch.setattr(mod.latest.LatestSnapshot, "update", boom)
+    monkeypatch.setattr(mod.latest.LatestSnapshot, "flush", boom)
+
+    results = await mod.run_job(store=store)
+
+    assert all(r["key"] for r in results)
+    assert len(store.list("raw_forecasts/")) == 2
+    assert len(store.list("run_reports/")) == 1
+    out = capsys.readouterr().out
+    assert "Error updating latest snapshot for NAM / sky_pilot" in out
+    assert "Error writing latest snapshot" in out
+
+
+@pytest.mark.asyncio
+async def test_run_job_prunes_unplanned_pairs_from_latest_snapshot(
+    monkeypatch, fake_playwright
+):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore("latest-prune")
+    await mod.run_job(store=store)
+
+    # A run over a subset keeps the pairs it did not visit
+    await mod.run_job(store=store, models=["NAM"])
+    table = mod.latest.read_latest(store)
+    assert set(table.column("model").to_pylist()) == {"icon", "nam"}
+
+    # Once ICON is dropped from MODELS it leaves all.parquet too
+    monkeypatch.setattr(mod, "MODELS", json.dumps({"NAM": "nam"}))
+    await mod.run_job(store=store)
+
+    table = mod.latest.read_latest(store)
+    assert set(table.column("model").to_pylist()) == {"nam"}
+
+
+@pytest.mark.asyncio
+async def test_run_job_writes_run_report(monkeypatch, fake_playwright, capsys):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore("reports")
+
+    # ICON's page finds no table; it is reported as a failed pair, not retried
+    real_stream = mod.stream_spotwx_table
+    calls = []
+
+    async def flaky_stream(page, url, model_name, location, store, **kwargs):
+        calls.append(model_name)
+        if model_name == "ICON":
+            return {"rows": 0, "bytes": 0, "key": None, "quarantined": False}
+        return await real_stream(page, url, model_name, location, store, **kwargs)
+
+    monkeypatch.setattr(mod, "stream_spotwx_table", flaky_stream)
+
+    results = await mod.run_job(store=store)
+
+    assert sorted(calls) == ["ICON", "NAM"]
+    assert all(r["attempts"] == 1 for r in results)
+    (key,) = store.list("run_reports/")
+    report = json.loads(store.get(key))
+    assert report["pairs"] == 2
+    assert report["failed_pairs"] == 1
+    assert report["retries"] == 0
+    assert report["rows"] == 2
+    assert len(report["pair_results"]) == 2
+    assert "Run report run_reports/" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_run_job_context_pool_mode(monkeypatch, fake_playwright, tmp_path):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod.browser_pool, "ASSET_CACHE_DIR", str(tmp_path))
+    store = mod.storage.MemoryStore("pool")
+
+    results = await mod.run_job(store=store, concurrency=2, context_pool=2)
+
+    assert {r["model"] for r in results} == {"NAM", "ICON"}
+    (key,) = store.list("run_reports/")
+    report = json.loads(store.get(key))
+    assert report["context_pool"] == 2
+    assert report["asset_cache_hits"] == 0
+
+
+def test_work_plan_rejects_unknown_names():
+    with pytest.raises(ValueError, match="Unknown model"):
+        mod.work_plan(models=["NOPE"])
+
+
+def test_lambda_handler_rejects_invalid_config_before_launching(monkeypatch):
+    def no_browser():
+        raise AssertionError("browser should not start")
+
+    monkeypatch.setattr(mod, "async_playwright", no_browser)
+    monkeypatch.setattr(mod, "LOCATIONS", json.dumps({"x": {"lat": 123, "lon": 0}}))
+    resp = mod.lambda_handler({}, {})
+    assert resp["statusCode"] == 500
+    assert "Invalid LOCATIONS config" in resp["body"]
 
 
 # ---------------------------- Tests: lambda_handler ----------------------------
 
 
 def test_lambda_handler_success(monkeypatch):
-    async def noop():
+    async def noop(**kwargs):
         return
 
     monkeypatch.setattr(mod, "run_job", noop)
@@ -316,8 +686,62 @@ def test_lambda_handler_success(monkeypatch):
     assert "Data collection completed successfully" in resp["body"]
 
 
+def test_lambda_handler_freshness_mode(monkeypatch):
+    seen = {}
+
+    async def fake_run_job(**kwargs):
+        seen.update(kwargs)
+
+    monkeypatch.setattr(mod, "run_job", fake_run_job)
+    resp = mod.lambda_handler({"mode": "freshness"}, {})
+    assert resp["statusCode"] == 200
+    assert seen == {"only_due": True}
+
+
+@pytest.mark.asyncio
+async def test_run_job_only_due_skips_collected_pairs(monkeypatch, fake_playwright):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore()
+    # The page serves the current run
+    now = datetime.now(timezone.utc)
+    fake_playwright._rows = [[now.strftime("%Y-%m-%d %H:00Z"), "15.2", "70"]]
+
+    first = await mod.run_job(store=store, only_due=True)
+    assert {r["model"] for r in first} == {"NAM", "ICON"}
+
+    # Learned column baselines are persisted next to the freshness state
+    assert store.exists(mod.schema.STATE_KEY)
+
+    # Nothing new has been published since, so the second pass does nothing
+    second = await mod.run_job(store=store, only_due=True)
+    assert second == []
+    assert len(store.list("raw_forecasts/")) == 2
+
+
+@pytest.mark.asyncio
+async def test_run_job_only_due_retries_pages_still_on_the_previous_run(
+    monkeypatch, fake_playwright, capsys
+):
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    store = mod.storage.MemoryStore()
+    # Upstream is late: the page still shows a run from two days ago
+    stale = datetime.now(timezone.utc) - timedelta(days=2)
+    fake_playwright._rows = [[stale.strftime("%Y-%m-%d %H:00Z"), "15.2", "70"]]
+
+    first = await mod.run_job(store=store, only_due=True)
+    assert all(r["rows"] == 1 for r in first)
+    assert "will retry" in capsys.readouterr().out
+    assert mod.freshness.load_state(store) == {}
+
+    # So the next pass tries both pairs again
+    second = await mod.run_job(store=store, only_due=True)
+    assert {r["model"] for r in second} == {"NAM", "ICON"}
+
+
 def test_lambda_handler_failure(monkeypatch):
-    async def boom():
+    async def boom(**kwargs):
         raise RuntimeError("nope")
 
     monkeypatch.setattr(mod, "run_job", boom)
@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import src.encoding as encoding
+import src.transform as transform
+
+COLLECTED = datetime(2025, 8, 8, 22, 16, 24, tzinfo=timezone.utc)
+
+
+def _batches(rows: int = 10, batch_size: int = 4):
+    columns, data = encoding.synthetic_rows(rows)
+    return [
+        transform.rows_to_batch(columns, data[start : start + batch_size])
+        for start in range(0, rows, batch_size)
+    ]
+
+
+def _in_thread(batches, coerce=True) -> bytes:
+    writer = transform.ForecastParquetWriter(COLLECTED, coerce=coerce)
+    for batch in batches:
+        writer.write(batch)
+    return writer.finish()
+
+
+def test_parse_processes(monkeypatch):
+    monkeypatch.setattr(encoding, "default_processes", lambda: 3)
+    assert encoding.parse_processes(None) == 3
+    assert encoding.parse_processes("auto") == 3
+    assert encoding.parse_processes("2") == 2
+    assert encoding.parse_processes("-1") == 0
+
+
+def test_batches_stream_to_the_worker_as_they_arrive(monkeypatch):
+    sent = []
+    real_send = encoding._send_batch
+    monkeypatch.setattr(
+        encoding,
+        "_send_batch",
+        lambda conn, header, buffer: (
+            sent.append(header) or real_send(conn, header, buffer)
+        ),
+    )
+    batches = _batches()
+
+    async def run():
+        with encoding.TransformExecutor(1) as executor:
+            writer = executor.writer(COLLECTED)
+            for count, batch in enumerate(batches, 1):
+                await executor.write(writer, batch)
+                # Nothing is buffered in this process between batches
+                assert len(sent) == count
+            return writer.rows, await executor.finish(writer)
+
+    rows, body = asyncio.run(run())
+    assert rows == 10
+    assert body == _in_thread(batches)
+
+
+def test_executor_encodes_in_worker_processes():
+    batches = _batches()
+
+    async def encode(executor, coerce):
+        writer = executor.writer(COLLECTED, coerce=coerce)
+        for batch in batches:
+            await executor.write(writer, batch)
+        return await executor.finish(writer)
+
+    async def run():
+        with encoding.TransformExecutor(2) as executor:
+            assert executor.processes == 2
+            return await asyncio.gather(
+                encode(executor, True),
+                encode(executor, False),
+                encode(executor, True),
+            )
+
+    coerced, stringified, again = asyncio.run(run())
+    assert coerced == again == _in_thread(batches)
+    assert stringified == _in_thread(batches, coerce=False)
+    table = pq.read_table(pa.BufferReader(coerced))
+    assert table.schema.field("tmp").type == pa.float32()
+
+
+def test_executor_falls_back_in_thread_when_workers_cannot_start(monkeypatch, capsys):
+    class NoSemaphores:
+        def Pipe(self):
+            raise OSError(38, "Function not implemented")
+
+    monkeypatch.setattr(
+        encoding.multiprocessing, "get_context", lambda method: NoSemaphores()
+    )
+    batches = _batches()
+
+    async def run():
+        with encoding.TransformExecutor(2) as executor:
+            writer = executor.writer(COLLECTED)
+            for batch in batches:
+                await executor.write(writer, batch)
+            return executor.processes, await executor.finish(writer)
+
+    processes, body = asyncio.run(run())
+    assert processes == 0
+    assert body == _in_thread(batches)
+    assert "encoding in-thread" in capsys.readouterr().out
+
+
+def test_executor_survives_its_only_worker_dying(capsys):
+    batches = _batches()
+
+    async def encode(executor, writer=None):
+        writer = writer or executor.writer(COLLECTED)
+        for batch in batches:
+            await executor.write(writer, batch)
+        return await executor.finish(writer)
+
+    async def run():
+        with encoding.TransformExecutor(1) as executor:
+            await encode(executor)
+            # A pair already streaming to the worker when it dies fails
+            streaming = executor.writer(COLLECTED)
+            await executor.write(streaming, batches[0])
+            executor._workers[0].process.kill()
+            executor._workers[0].process.join()
+            with pytest.raises(encoding.EncodeError):
+                await asyncio.wait_for(encode(executor, streaming), timeout=30)
+            # Later pairs must not wait for it, and encode in-thread
+            bodies = await asyncio.wait_for(
+                asyncio.gather(encode(executor), encode(executor)), timeout=30
+            )
+            return executor.processes, bodies
+
+    processes, bodies = asyncio.run(run())
+    assert processes == 0
+    assert bodies == [_in_thread(batches)] * 2
+    assert "retiring it" in capsys.readouterr().out
+
+
+def test_worker_encoding_errors_are_raised_and_worker_kept():
+    columns, data = encoding.synthetic_rows(2)
+    bad = [["not a time", *data[0][1:]]]
+
+    async def run():
+        with encoding.TransformExecutor(1) as executor:
+            writer = executor.writer(COLLECTED)
+            await executor.write(writer, transform.rows_to_batch(columns, bad))
+            with pytest.raises(encoding.EncodeError):
+                await executor.finish(writer)
+            # The worker carries on with the next pair
+            good = executor.writer(COLLECTED)
+            await executor.write(good, transform.rows_to_batch(columns, data))
+            await executor.finish(good)
+            return executor.processes
+
+    assert asyncio.run(run()) == 1
+
+
+@pytest.mark.parametrize("processes", [0, 1])
+def test_empty_writer_encodes_to_nothing(processes):
+    async def run():
+        with encoding.TransformExecutor(processes) as executor:
+            return await executor.finish(executor.writer(COLLECTED))
+
+    assert asyncio.run(run()) == b""
+
+
+def test_discarded_pair_frees_the_worker():
+    batches = _batches()
+
+    async def run():
+        with encoding.TransformExecutor(1) as executor:
+            abandoned = executor.writer(COLLECTED)
+            await executor.write(abandoned, batches[0])
+            await executor.discard(abandoned)
+            assert executor._workers[0].pairs == 0
+
+            writer = executor.writer(COLLECTED)
+            for batch in batches:
+                await executor.write(writer, batch)
+            return await executor.finish(writer)
+
+    assert asyncio.run(run()) == _in_thread(batches)
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import src.freshness as freshness
+import src.storage as storage
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_model_cycle_longest_prefix_and_default():
+    assert freshness.model_cycle("nam_awphys") == freshness.MODEL_CYCLES["nam"]
+    assert (
+        freshness.model_cycle("gem_lam_continental")
+        == (freshness.MODEL_CYCLES["gem_lam"])
+    )
+    assert freshness.model_cycle("mystery") == freshness.DEFAULT_CYCLE
+
+
+def test_latest_run_respects_cycle_and_publication_delay():
+    # NAM: 6 hourly, ~2h delay. At 13:30 the 12Z run is not out yet.
+    assert freshness.latest_run("nam", _utc(2025, 8, 8, 13, 30)) == _utc(2025, 8, 8, 6)
+    assert freshness.latest_run("nam", _utc(2025, 8, 8, 14, 5)) == _utc(2025, 8, 8, 12)
+    # HRRR is hourly
+    assert freshness.latest_run("hrrr", _utc(2025, 8, 8, 14, 5)) == _utc(2025, 8, 8, 12)
+    # Crossing midnight lands on the previous day's run
+    assert freshness.latest_run("gdps", _utc(2025, 8, 8, 3)) == _utc(2025, 8, 7, 12)
+
+
+def test_is_due_only_when_a_newer_run_is_published():
+    state = {}
+    now = _utc(2025, 8, 8, 14, 5)
+    assert freshness.is_due(state, "sky_pilot", "NAM", "nam", now)
+
+    freshness.mark_collected(state, "sky_pilot", "NAM", _utc(2025, 8, 8, 12))
+    assert not freshness.is_due(state, "sky_pilot", "NAM", "nam", now)
+    assert freshness.is_due(state, "wedge", "NAM", "nam", now)
+    assert freshness.is_due(state, "sky_pilot", "NAM", "nam", _utc(2025, 8, 8, 20, 5))
+
+
+def test_state_round_trip_through_store():
+    store = storage.MemoryStore()
+    assert freshness.load_state(store) == {}
+
+    state = {}
+    freshness.mark_collected(state, "sky_pilot", "NAM", _utc(2025, 8, 8, 12))
+    freshness.save_state(store, state)
+
+    loaded = freshness.load_state(store)
+    assert freshness.last_collected(loaded, "sky_pilot", "NAM") == _utc(2025, 8, 8, 12)
+
+
+def test_observed_run_reads_first_forecast_hour_in_page_time_zone():
+    # Local midnight in Vancouver is 07Z, which is the 06Z NAM run
+    assert freshness.observed_run(
+        "nam", "2025-08-08 00:00", "America/Vancouver"
+    ) == _utc(2025, 8, 8, 6)
+    # An explicit offset wins over the page's time zone
+    assert freshness.observed_run(
+        "hrrr", "2025-08-08 13:00Z", "America/Vancouver"
+    ) == _utc(2025, 8, 8, 13)
+    assert freshness.observed_run("nam", "not a time", "UTC") is None
+    assert freshness.observed_run("nam", None, "UTC") is None
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pytest
+
+import src.latest as latest
+import src.storage as storage
+import src.transform as transform
+
+COLLECTED = datetime(2025, 8, 8, 22, 16, 24, tzinfo=timezone.utc)
+
+
+def _body(temps: list[str]) -> bytes:
+    writer = transform.ForecastParquetWriter(COLLECTED)
+    rows = [[f"2025-08-08 {h:02d}:00Z", t] for h, t in enumerate(temps)]
+    writer.write(transform.rows_to_batch(["forecast_time", "tmp"], rows))
+    return writer.finish()
+
+
+def test_pair_key():
+    assert (
+        latest.pair_key("sky_pilot", "NAM")
+        == "latest/location=sky_pilot/model=nam.parquet"
+    )
+
+
+def test_update_replaces_only_that_pairs_rows():
+    store = storage.MemoryStore()
+    snapshot = latest.LatestSnapshot(store, flush_interval_s=0)
+
+    snapshot.update("sky_pilot", "NAM", _body(["1.0", "2.0"]))
+    snapshot.update("whistler", "NAM", _body(["3.0"]))
+    snapshot.update("sky_pilot", "NAM", _body(["9.0"]))
+
+    table = latest.read_latest(store).sort_by("location")
+    assert table.column("location").to_pylist() == ["sky_pilot", "whistler"]
+    assert table.column("tmp").to_pylist() == [9.0, 3.0]
+    assert store.get(latest.pair_key("sky_pilot", "NAM")) == _body(["9.0"])
+
+
+def test_flush_is_throttled_and_resumes_from_existing_snapshot():
+    store = storage.MemoryStore()
+    first = latest.LatestSnapshot(store, flush_interval_s=0)
+    first.update("sky_pilot", "NAM", _body(["1.0"]))
+
+    second = latest.LatestSnapshot(store, flush_interval_s=3600)
+    second.update("sky_pilot", "NAM", _body(["1.0"]))
+    second.update("sky_pilot", "ICON", _body(["5.0", "6.0"]))
+    # The first update flushed; the second waits for the interval or flush()
+    assert latest.read_latest(store).num_rows == 1
+
+    second.flush()
+    table = latest.read_latest(store)
+    assert table.num_rows == 3
+    assert table.schema.field("model").type == pa.string()
+    assert sorted(set(table.column("model").to_pylist())) == ["icon", "nam"]
+
+
+def test_unmergeable_update_drops_the_stale_pair():
+    store = storage.MemoryStore()
+    snapshot = latest.LatestSnapshot(store, flush_interval_s=0)
+    snapshot.update("sky_pilot", "NAM", _body(["1.0"]))
+    snapshot.update("whistler", "NAM", _body(["3.0"]))
+
+    # tmp as text, e.g. written by a different transform version
+    writer = transform.ForecastParquetWriter(COLLECTED, coerce=False)
+    writer.write(transform.rows_to_batch(["forecast_time", "tmp"], [["x", "warm"]]))
+    with pytest.raises(pa.ArrowTypeError):
+        snapshot.update("sky_pilot", "NAM", writer.finish())
+
+    snapshot.flush()
+    table = latest.read_latest(store)
+    assert table.column("location").to_pylist() == ["whistler"]
+
+
+def test_prune_drops_pairs_no_longer_planned():
+    store = storage.MemoryStore()
+    snapshot = latest.LatestSnapshot(store, flush_interval_s=0)
+    snapshot.update("sky_pilot", "NAM", _body(["1.0"]))
+    snapshot.update("sky_pilot", "ICON", _body(["2.0"]))
+    snapshot.update("whistler", "NAM", _body(["3.0"]))
+
+    snapshot.prune([("sky_pilot", "NAM"), ("whistler", "NAM"), ("wedge", "NAM")])
+    snapshot.flush()
+
+    table = latest.read_latest(store).sort_by("location")
+    assert table.column("location").to_pylist() == ["sky_pilot", "whistler"]
+    assert set(table.column("model").to_pylist()) == {"nam"}
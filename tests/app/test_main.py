@@ -0,0 +1,224 @@
+import json
+import types
+
+import pytest
+
+import main
+
+
+def test_parser_collect_flags():
+    args = main.build_parser().parse_args(
+        [
+            "collect",
+            "--locations",
+            "sky_pilot, wedge",
+            "--models",
+            "NAM",
+            "--engine",
+            "firefox",
+            "--concurrency",
+            "4",
+            "--rate-limit",
+            "0.5",
+            "--storage",
+            "memory://cli",
+            "--dry-run",
+        ]
+    )
+    assert args.locations == ["sky_pilot", "wedge"]
+    assert args.models == ["NAM"]
+    assert args.engine == "firefox"
+    assert args.concurrency == 4
+    assert args.rate_limit == 0.5
+    assert args.storage == "memory://cli"
+    assert args.dry_run is True
+
+
+def test_parser_requires_command():
+    with pytest.raises(SystemExit):
+        main.build_parser().parse_args([])
+
+
+def test_format_timing_table_aligns_columns():
+    table = main.format_timing_table(
+        [
+            {"location": "sky_pilot", "model": "NAM", "rows": 2, "total_s": 1.5},
+            {"location": "x", "model": "ICON", "rows": 10, "total_s": 12.25},
+        ]
+    )
+    lines = table.splitlines()
+    assert lines[0].startswith("location")
+    assert set(lines[1].replace(" ", "")) == {"-"}
+    assert lines[2].startswith("sky_pilot")
+    assert len(lines) == 4
+
+
+def test_cmd_collect_passes_flags_to_run_job(monkeypatch, capsys):
+    seen = {}
+
+    async def fake_run_job(**kwargs):
+        seen.update(kwargs)
+        return [{"location": "sky_pilot", "model": "NAM", "rows": 2}]
+
+    monkeypatch.setattr(main.collector, "run_job", fake_run_job)
+    monkeypatch.setattr(main.collector, "MIN_SLEEP_TIME", 3.0)
+    monkeypatch.setattr(main.collector, "MAX_SLEEP_TIME", 10.0)
+
+    rc = main.main(
+        [
+            "collect",
+            "--models",
+            "NAM",
+            "--concurrency",
+            "2",
+            "--storage",
+            "memory://cli-test",
+            "--sleep",
+            "0",
+            "0",
+            "--dry-run",
+            "--encode-processes",
+            "0",
+        ]
+    )
+
+    assert rc == 0
+    assert seen["models"] == ["NAM"]
+    assert seen["encode_processes"] == 0
+    assert seen["concurrency"] == 2
+    assert seen["dry_run"] is True
+    assert seen["store"].uri == "memory://cli-test"
+    assert main.collector.MAX_SLEEP_TIME == 0
+    assert "sky_pilot" in capsys.readouterr().out
+
+
+def test_cmd_collect_dry_run_needs_no_storage(monkeypatch, capsys):
+    # The README's `collect --dry-run --sleep 0 0` with nothing configured
+    monkeypatch.delenv("STORAGE_URI", raising=False)
+    monkeypatch.delenv("BUCKET", raising=False)
+    monkeypatch.setattr(
+        main.collector,
+        "LOCATIONS",
+        json.dumps({"sky_pilot": {"lat": 49.63, "lon": -123.09, "tz": "UTC"}}),
+    )
+    monkeypatch.setattr(main.collector, "MODELS", json.dumps({"NAM": "nam"}))
+    monkeypatch.setattr(main.collector, "ENCODE_PROCESSES", "0")
+    stores = []
+
+    async def fake_stream(page, url, model_name, location, store, **kwargs):
+        stores.append(store)
+        return {"rows": 2, "bytes": 10, "key": None, "quarantined": False}
+
+    class FakeBrowser:
+        async def new_context(self, **kwargs):
+            return types.SimpleNamespace(new_page=self.new_page, close=self.close)
+
+        async def new_page(self):
+            return None
+
+        async def close(self):
+            return
+
+    class FakePlaywright:
+        async def __aenter__(self):
+            async def launch(headless=True, args=None):
+                return FakeBrowser()
+
+            return types.SimpleNamespace(chromium=types.SimpleNamespace(launch=launch))
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+    monkeypatch.setattr(main.collector, "stream_spotwx_table", fake_stream)
+    monkeypatch.setattr(main.collector, "async_playwright", FakePlaywright)
+
+    rc = main.main(["collect", "--dry-run", "--sleep", "0", "0"])
+
+    assert rc == 0
+    assert [store.uri for store in stores] == ["memory://dry-run"]
+    assert "Collected 1 pair(s)" in capsys.readouterr().out
+
+
+def test_cmd_replay_runs_date_range(monkeypatch, capsys):
+    seen = {}
+
+    def fake_replay(store_uri, start, end, version, processes=None):
+        seen.update(
+            store_uri=store_uri,
+            start=start,
+            end=end,
+            version=version,
+            processes=processes,
+        )
+        return [{"rows": 5}, {"rows": 7}]
+
+    monkeypatch.setattr(main.replay, "replay", fake_replay)
+
+    rc = main.main(
+        [
+            "replay",
+            "--from",
+            "2025-08-01",
+            "--to",
+            "2025-08-31",
+            "--version",
+            "2",
+            "--processes",
+            "0",
+            "--storage",
+            "file:///tmp/wx",
+        ]
+    )
+
+    assert rc == 0
+    assert seen["start"].isoformat() == "2025-08-01"
+    assert seen["end"].isoformat() == "2025-08-31"
+    assert seen["version"] == "2"
+    assert seen["processes"] == 0
+    assert seen["store_uri"] == "file:///tmp/wx"
+    assert "Replayed 2 payload(s), 12 rows" in capsys.readouterr().out
+
+
+def test_cmd_reports_exits_nonzero_on_regression(monkeypatch, capsys):
+    store = main.storage.open_store("memory://cli-reports")
+    now = main.datetime.now(main.timezone.utc)
+    for i, p95 in enumerate([2.0, 2.1, 1.9, 6.0]):
+        main.reports.write_report(
+            store,
+            {
+                "started_at": now.replace(microsecond=0, second=i).isoformat(),
+                "duration_s": 20.0,
+                "pairs": 10,
+                "rows": 100,
+                "duration_per_pair_s": 2.0,
+                "page_latency_p95_s": p95,
+            },
+        )
+
+    rc = main.main(["reports", "--storage", "memory://cli-reports"])
+
+    out = capsys.readouterr().out
+    assert rc == 1
+    assert "REGRESSION" in out
+    assert "page_latency_p95_s 6.0" in out
+
+
+def test_cmd_bench_encode_prints_both_modes(monkeypatch, capsys):
+    seen = {}
+
+    def fake_benchmark(pairs, rows, processes=None):
+        seen.update(pairs=pairs, rows=rows, processes=processes)
+        return [
+            {"mode": "in-thread", "encode_s": 1.0},
+            {"mode": "2 process(es)", "encode_s": 0.5, "speedup": 2.0},
+        ]
+
+    monkeypatch.setattr(main.encoding, "benchmark", fake_benchmark)
+
+    rc = main.main(["bench-encode", "--pairs", "4", "--rows", "10", "--processes", "2"])
+
+    assert rc == 0
+    assert seen == {"pairs": 4, "rows": 10, "processes": 2}
+    out = capsys.readouterr().out
+    assert "in-thread" in out
+    assert "2 process(es)" in out
@@ -0,0 +1,119 @@
+import json
+import types
+
+import pytest
+
+import src.plan as plan
+
+LOCATIONS = json.dumps(
+    {
+        "sky_pilot": {"lat": 49.63, "lon": -123.09, "tz": "America%2FVancouver"},
+        "squamish": {"lat": "49.70", "lon": "-123.15", "tz": "America/Vancouver"},
+    }
+)
+MODELS = json.dumps({"NAM": "nam", "GFS": "gfs", "HRRR": "hrrr"})
+BASE_URL = "https://example.com/spotwx"
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    plan.build_plan.cache_clear()
+    plan.ssm_parameter.cache_clear()
+
+
+def test_build_plan_orders_by_priority_then_cost():
+    items = plan.build_plan(LOCATIONS, MODELS, BASE_URL)
+
+    assert len(items) == 6
+    assert [i.model_name for i in items[:2]] == ["HRRR", "HRRR"]
+    # Same 6h cycle: the more expensive GFS page is scheduled before NAM
+    assert [i.model_name for i in items[2:]] == ["GFS", "GFS", "NAM", "NAM"]
+    assert items[0].priority == 1
+    assert items[2].cost > items[4].cost
+
+
+def test_build_plan_normalises_urls():
+    items = {
+        (i.location, i.model_name): i
+        for i in plan.build_plan(LOCATIONS, MODELS, BASE_URL)
+    }
+    assert items[("sky_pilot", "NAM")].url == (
+        "https://example.com/spotwx?model=nam&lat=49.63&lon=-123.09"
+        "&tz=America%2FVancouver&display=table"
+    )
+    # Plain tz is encoded the same way and numeric strings become floats
+    squamish = items[("squamish", "NAM")]
+    assert squamish.tz == "America/Vancouver"
+    assert squamish.lat == 49.7
+    assert "tz=America%2FVancouver" in squamish.url
+
+
+def test_build_plan_is_cached_per_config():
+    first = plan.build_plan(LOCATIONS, MODELS, BASE_URL)
+    assert plan.build_plan(LOCATIONS, MODELS, BASE_URL) is first
+    assert plan.build_plan.cache_info().hits == 1
+
+
+@pytest.mark.parametrize(
+    "locations, message",
+    [
+        ({"a": {"lat": 91, "lon": 0, "tz": "UTC"}}, "lat 91.0 out of range"),
+        ({"a": {"lat": 0, "lon": -181, "tz": "UTC"}}, "lon -181.0 out of range"),
+        ({"a": {"lat": "north", "lon": 0, "tz": "UTC"}}, "must be numbers"),
+        ({"a": {"lat": 0, "lon": 0, "tz": "../etc"}}, "invalid tz"),
+        ({"a": {"lat": 0, "lon": 0, "tz": "Foo/Bar"}}, "invalid tz"),
+        ({"a": {"lat": 0, "lon": 0, "tz": "America"}}, "invalid tz"),
+        ({"a": {"lat": 0, "lon": 0}}, "invalid tz"),
+    ],
+)
+def test_parse_locations_rejects_bad_entries(locations, message):
+    with pytest.raises(ValueError, match=message):
+        plan.parse_locations(json.dumps(locations))
+
+
+def test_parse_models_rejects_bad_json_and_codes():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        plan.parse_models("{nope")
+    with pytest.raises(ValueError, match="empty model code for NAM"):
+        plan.parse_models(json.dumps({"NAM": ""}))
+
+
+def test_work_plan_filters_subset():
+    items = plan.work_plan(
+        LOCATIONS, MODELS, BASE_URL, locations=["squamish"], models=["GFS"]
+    )
+    assert [(i.location, i.model_name) for i in items] == [("squamish", "GFS")]
+
+
+def test_work_plan_accepts_config_dicts():
+    items = plan.work_plan(json.loads(LOCATIONS), json.loads(MODELS), BASE_URL)
+    assert len(items) == 6
+    assert items == plan.work_plan(LOCATIONS, MODELS, BASE_URL)
+
+
+def test_work_plan_reads_config_from_ssm_once(monkeypatch):
+    calls = []
+
+    class FakeSSM:
+        def get_parameter(self, Name):
+            calls.append(Name)
+            value = {"/fc/locations": LOCATIONS, "/fc/models": MODELS}[Name]
+            return {"Parameter": {"Value": value}}
+
+    monkeypatch.setattr(
+        plan, "boto3", types.SimpleNamespace(client=lambda name: FakeSSM())
+    )
+    monkeypatch.setenv("LOCATIONS_PARAMETER", "/fc/locations")
+    monkeypatch.setenv("MODELS_PARAMETER", "/fc/models")
+
+    plan.work_plan("", "", BASE_URL)
+    items = plan.work_plan("", "", BASE_URL)
+
+    assert len(items) == 6
+    assert calls == ["/fc/locations", "/fc/models"]
+
+
+def test_work_plan_without_any_config_fails(monkeypatch):
+    monkeypatch.delenv("LOCATIONS_PARAMETER", raising=False)
+    with pytest.raises(ValueError, match="LOCATIONS_PARAMETER"):
+        plan.work_plan("", MODELS, BASE_URL)
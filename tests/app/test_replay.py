@@ -0,0 +1,122 @@
+import io
+import json
+from datetime import date, datetime, timezone
+
+import pyarrow.parquet as pq
+import pytest
+
+import src.replay as replay
+import src.schema as schema
+import src.storage as storage
+
+COLLECTED = datetime(2025, 8, 8, 22, 16, 24, tzinfo=timezone.utc)
+HEADERS = ["forecast_time", "tmp", "rh"]
+# As the page renders them; replay normalises with the current code
+RAW_HEADERS = ["Time", "TMP", "RH"]
+ROWS = [["2025-08-08 12:00Z", "15.2", "70"], ["2025-08-08 15:00Z", "17.1", "60"]]
+
+
+@pytest.fixture(autouse=True)
+def fresh_worker_context():
+    replay._worker_context.cache_clear()
+
+
+def _payload(
+    model="NAM", location="sky_pilot", headers=RAW_HEADERS, rows=ROWS
+) -> bytes:
+    writer = replay.PayloadWriter(
+        {
+            "model": model,
+            "location": location,
+            "collected_time": COLLECTED.isoformat(),
+            "headers": headers,
+        }
+    )
+    writer.write_rows(rows[:1])
+    writer.write_rows(rows[1:])
+    return writer.finish()
+
+
+def _key(day: str, location="sky_pilot", model="nam") -> str:
+    return (
+        f"raw_payloads/location={location}/model={model}/date={day}/"
+        f"{day}_22-16-24Z.jsonl.gz"
+    )
+
+
+def test_payload_round_trip_is_deterministic():
+    body = _payload()
+    assert body == _payload()
+    meta, rows = replay.read_payload(body)
+    assert meta["headers"] == RAW_HEADERS
+    assert rows == ROWS
+
+
+def test_payload_keys_filters_by_date_partition():
+    store = storage.MemoryStore()
+    for day in ["2025-08-01", "2025-08-05", "2025-08-09"]:
+        store.put(_key(day), _payload())
+    store.put("raw_payloads/README", b"not a payload")
+
+    store.put(_key("2025-08-05", location="wedge", model="icon"), _payload())
+    listed = []
+    real_list = store.list
+    store.list = lambda prefix="": listed.append(prefix) or real_list(prefix)
+
+    keys = replay.payload_keys(store, date(2025, 8, 2), date(2025, 8, 9))
+    assert keys == [
+        _key("2025-08-05"),
+        _key("2025-08-09"),
+        _key("2025-08-05", location="wedge", model="icon"),
+    ]
+    # Only the partitions in range have their objects listed
+    assert listed == [key.rsplit("/", 1)[0] + "/" for key in keys]
+
+
+def test_replay_key_mirrors_partitions_under_version():
+    assert replay.replay_key(_key("2025-08-05"), "2", "raw_forecasts") == (
+        "replays/version=2/raw_forecasts/location=sky_pilot/model=nam/"
+        "date=2025-08-05/2025-08-05_22-16-24Z.parquet"
+    )
+
+
+def test_replay_in_process_rewrites_with_current_transform():
+    store = replay.storage.open_store("memory://replay-inline")
+    store.put(_key("2025-08-05"), _payload())
+    store.put(_key("2025-08-06", model="icon"), _payload(model="ICON"))
+
+    results = replay.replay(
+        "memory://replay-inline", date(2025, 8, 1), date(2025, 8, 31), "2", processes=0
+    )
+
+    assert [r["rows"] for r in results] == [2, 2]
+    table = pq.read_table(io.BytesIO(store.get(results[0]["key"])))
+    assert table.column_names == HEADERS + ["collected_time"]
+    assert table.column("tmp").to_pylist()[0] == pytest.approx(15.2)
+
+
+def test_replay_quarantines_payloads_that_no_longer_conform():
+    store = replay.storage.open_store("memory://replay-drift")
+    store.put(
+        schema.STATE_KEY,
+        json.dumps({"NAM": {"columns": HEADERS, "fingerprint": "x"}}).encode(),
+    )
+    store.put(_key("2025-08-05"), _payload(headers=["Time", "TMP", "PTYPE"]))
+
+    (result,) = replay.replay(
+        "memory://replay-drift", date(2025, 8, 5), date(2025, 8, 5), "3", processes=0
+    )
+    assert result["key"].startswith("replays/version=3/quarantine/")
+
+
+def test_replay_across_processes(tmp_path):
+    uri = f"file://{tmp_path}"
+    store = storage.open_store(uri)
+    days = [f"2025-08-{d:02d}" for d in range(1, 9)]
+    for day in days:
+        store.put(_key(day), _payload())
+
+    results = replay.replay(uri, date(2025, 8, 1), date(2025, 8, 31), "2", processes=2)
+
+    assert len(results) == len(days)
+    assert len(store.list("replays/version=2/raw_forecasts/")) == len(days)
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+import src.reports as reports
+import src.storage as storage
+
+STARTED = datetime(2025, 8, 8, 13, 15, tzinfo=timezone.utc)
+
+
+def _result(scrape_s, rows=10, attempts=1, wait_s=1.0, rss_mb=250.0):
+    return {
+        "location": "sky_pilot",
+        "model": "NAM",
+        "rows": rows,
+        "bytes": 1000,
+        "attempts": attempts,
+        "wait_s": wait_s,
+        "scrape_s": scrape_s,
+        "persist_s": 0.1,
+        "total_s": scrape_s + wait_s,
+        "rss_mb": rss_mb,
+        "key": "raw_forecasts/x.parquet",
+    }
+
+
+def _report(p95, duration=100.0, pairs=10, started=STARTED):
+    return {
+        "started_at": started.isoformat(),
+        "duration_s": duration,
+        "pairs": pairs,
+        "rows": 100,
+        "duration_per_pair_s": duration / pairs,
+        "page_latency_p95_s": p95,
+    }
+
+
+def test_percentile_nearest_rank():
+    assert reports.percentile([], 95) == 0.0
+    assert reports.percentile([3.0], 95) == 3.0
+    assert reports.percentile(list(range(1, 21)), 95) == 19
+    assert reports.percentile(list(range(1, 21)), 50) == 10
+
+
+def test_build_report_aggregates_pairs():
+    results = [
+        _result(2.0),
+        _result(4.0, attempts=2, rss_mb=400.0),
+        _result(9.0, rows=0, attempts=2),
+    ]
+    report = reports.build_report(results, STARTED, 30.0, engine="chromium")
+
+    assert report["pairs"] == 3
+    assert report["failed_pairs"] == 1
+    assert report["rows"] == 20
+    assert report["bytes"] == 3000
+    assert report["retries"] == 2
+    assert report["throttle_wait_s"] == 3.0
+    assert report["peak_rss_mb"] == 400.0
+    # Failed pages do not count towards page latency
+    assert report["page_latency_p95_s"] == 4.0
+    assert report["duration_per_pair_s"] == 10.0
+    assert report["engine"] == "chromium"
+    assert "key" not in report["pair_results"][0]
+
+
+def test_reports_round_trip_by_date_partition():
+    store = storage.MemoryStore()
+    for days_ago in (0, 1, 10):
+        started = STARTED - timedelta(days=days_ago)
+        key = reports.write_report(store, _report(1.0, started=started))
+        assert key.startswith(f"run_reports/date={started:%Y-%m-%d}/")
+
+    recent = reports.load_recent_reports(store, STARTED, days=7)
+    assert [r["started_at"] for r in recent] == [
+        (STARTED - timedelta(days=1)).isoformat(),
+        STARTED.isoformat(),
+    ]
+
+
+def test_check_budget_flags_p95_and_per_pair_regressions():
+    history = [_report(2.0), _report(2.2), _report(1.8)]
+    budget = {**reports.DEFAULT_BUDGET, "p95_page_latency_ratio": 1.25}
+
+    assert reports.check_budget(_report(2.4), history, budget) == []
+
+    problems = reports.check_budget(_report(3.0, duration=200.0), history, budget)
+    assert len(problems) == 2
+    assert problems[0].startswith("page_latency_p95_s 3.0 regressed past 2.5")
+    assert problems[1].startswith("duration_per_pair_s 20.0 regressed")
+
+
+def test_check_budget_flags_timeout_headroom_without_history(monkeypatch):
+    monkeypatch.setenv("PERF_BUDGET", '{"max_duration_s": 300}')
+    problems = reports.check_budget(_report(1.0, duration=310.0), [])
+    assert problems == ["duration 310.0s exceeds max_duration_s 300s"]
+
+
+def test_process_tree_rss_includes_current_process():
+    rss = reports.process_tree_rss_mb()
+    assert rss is None or rss > 0
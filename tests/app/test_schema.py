@@ -0,0 +1,121 @@
+import json
+
+import src.schema as schema
+import src.storage as storage
+
+
+def test_first_table_becomes_baseline():
+    registry = schema.SchemaRegistry()
+    check = registry.check("NAM", ["forecast_time", "tmp", "rh"])
+    assert check.status == "new"
+    assert check.conforming
+    assert registry.baselines["NAM"] == ["forecast_time", "tmp", "rh"]
+
+
+def test_matching_headers_are_served_from_cache():
+    registry = schema.SchemaRegistry({"NAM": ["forecast_time", "tmp", "rh"]})
+    first = registry.check("NAM", ["forecast_time", "tmp", "rh"])
+    second = registry.check("NAM", ["forecast_time", "tmp", "rh"])
+    assert first.status == "ok"
+    assert first is second
+
+
+def test_renamed_and_reordered_columns_are_remapped():
+    registry = schema.SchemaRegistry({"NAM": ["forecast_time", "tmp", "rh"]})
+    check = registry.check("NAM", ["forecast_time", "rh", "temp"])
+    assert check.status == "remapped"
+    assert check.renames == {"temp": "tmp"}
+    assert check.columns == ["forecast_time", "tmp", "rh"]
+
+
+def test_missing_and_unexpected_columns_are_drift():
+    registry = schema.SchemaRegistry({"NAM": ["forecast_time", "tmp", "rh"]})
+    check = registry.check("NAM", ["forecast_time", "tmp", "ptype"])
+    assert check.status == "drift"
+    assert not check.conforming
+    assert check.missing == ["rh"]
+    assert check.unexpected == ["ptype"]
+
+
+def test_tables_without_forecast_time_are_drift_even_without_baseline():
+    registry = schema.SchemaRegistry()
+    assert registry.check("ICON", ["tmp", "rh"]).status == "drift"
+    assert "ICON" not in registry.baselines
+
+
+def test_baselines_round_trip_through_store():
+    store = storage.MemoryStore()
+    registry = schema.SchemaRegistry()
+    registry.check("NAM", ["forecast_time", "tmp"])
+    registry.save(store)
+    assert not registry.dirty
+
+    restored = schema.SchemaRegistry()
+    restored.load(store)
+    assert restored.baselines == {"NAM": ["forecast_time", "tmp"]}
+    assert restored.check("NAM", ["forecast_time", "tmp"]).status == "ok"
+
+
+def test_missing_declared_column_is_filled_with_nulls():
+    registry = schema.SchemaRegistry({"NAM": ["forecast_time", "tmp", "rh"]})
+    check = registry.check("NAM", ["forecast_time", "rh"])
+    assert check.status == "remapped"
+    assert check.conforming
+    assert check.missing == ["tmp"]
+    assert check.columns == ["forecast_time", "tmp", "rh"]
+    assert check.positions == [0, None, 1]
+
+
+def test_declared_column_missing_from_baseline_extends_it():
+    # Baseline learned from a table whose "tmp" toggle click failed
+    registry = schema.SchemaRegistry({"NAM": ["forecast_time", "rh"]})
+    check = registry.check("NAM", ["forecast_time", "rh", "tmp"])
+    assert check.status == "ok"
+    assert registry.baselines["NAM"] == ["forecast_time", "rh", "tmp"]
+    assert registry.dirty
+
+
+def test_undeclared_columns_are_learned_on_first_sight():
+    registry = schema.SchemaRegistry()
+    headers = schema.normalize_headers(["DATETIME", "DATE", "TIME", "TMP", "RH"])
+    check = registry.check("NAM", headers)
+    assert check.status == "new"
+    assert registry.baselines["NAM"] == ["forecast_time", "date", "time", "tmp", "rh"]
+    assert registry.check("NAM", headers).conforming
+
+    # Only an undeclared column that shows up after the baseline is drift
+    check = registry.check("NAM", [*headers, "ptype"])
+    assert check.status == "drift"
+    assert check.unexpected == ["ptype"]
+
+
+def test_baseline_is_stored_as_columns_only():
+    store = storage.MemoryStore()
+    registry = schema.SchemaRegistry()
+    registry.check("NAM", ["forecast_time", "tmp"])
+    registry.save(store)
+    assert json.loads(store.get(schema.STATE_KEY)) == {
+        "NAM": {"columns": ["forecast_time", "tmp"]}
+    }
+
+
+def test_load_overwrites_cached_baselines():
+    store = storage.MemoryStore()
+    stored = schema.SchemaRegistry({"NAM": ["forecast_time", "tmp", "ptype"]})
+    stored.dirty = True
+    stored.save(store)
+
+    registry = schema.SchemaRegistry({"NAM": ["forecast_time", "tmp"]})
+    assert registry.check("NAM", ["forecast_time", "tmp", "ptype"]).status == "drift"
+    registry.load(store)
+    assert registry.baselines["NAM"] == ["forecast_time", "tmp", "ptype"]
+    assert registry.check("NAM", ["forecast_time", "tmp", "ptype"]).status == "ok"
+
+
+def test_normalize_headers_lowercases_and_names_the_time_column():
+    assert schema.normalize_headers([" Time ", "TMP", "RH"]) == [
+        "forecast_time",
+        "tmp",
+        "rh",
+    ]
+    assert schema.normalize_headers([]) == []
@@ -0,0 +1,198 @@
+import io
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+import src.storage as storage
+
+
+# ----------------------------- open_store -------------------------------------
+
+
+def test_open_store_s3_uri():
+    store = storage.open_store("s3://my-bucket/some/prefix")
+    assert isinstance(store, storage.S3Store)
+    assert store.bucket == "my-bucket"
+    assert store.prefix == "some/prefix"
+
+
+def test_open_store_file_uri(tmp_path):
+    store = storage.open_store(f"file://{tmp_path}")
+    assert isinstance(store, storage.LocalStore)
+    assert store.root == str(tmp_path)
+
+
+def test_open_store_memory_uri_is_shared():
+    a = storage.open_store("memory://shared-test")
+    a.put("k", b"v")
+    b = storage.open_store("memory://shared-test")
+    assert b.get("k") == b"v"
+
+
+def test_open_store_rejects_unknown_scheme():
+    with pytest.raises(ValueError):
+        storage.open_store("ftp://somewhere")
+
+
+def test_default_store_uri(monkeypatch):
+    monkeypatch.delenv("STORAGE_URI", raising=False)
+    monkeypatch.setenv("BUCKET", "b")
+    assert storage.default_store_uri() == "s3://b"
+    monkeypatch.setenv("STORAGE_URI", "memory://x")
+    assert storage.default_store_uri() == "memory://x"
+
+
+# ----------------------------- LocalStore -------------------------------------
+
+
+def test_local_store_round_trip(tmp_path):
+    store = storage.LocalStore(str(tmp_path))
+    store.put("raw_forecasts/location=a/model=nam/x.parquet", b"abc")
+    store.put("raw_forecasts/location=b/model=nam/y.parquet", b"def")
+
+    assert store.get("raw_forecasts/location=a/model=nam/x.parquet") == b"abc"
+    assert store.list("raw_forecasts/location=a") == [
+        "raw_forecasts/location=a/model=nam/x.parquet"
+    ]
+    assert len(store.list()) == 2
+    assert store.exists("raw_forecasts/location=b/model=nam/y.parquet")
+    assert not store.exists("nope")
+
+
+def test_local_store_list_walks_only_the_prefix_directory(tmp_path, monkeypatch):
+    store = storage.LocalStore(str(tmp_path))
+    store.put("run_reports/2025-08-08.json", b"{}")
+    store.put("run_reports/2025-08-09.json", b"{}")
+    store.put("raw_forecasts/location=a/model=nam/x.parquet", b"abc")
+
+    walked = []
+    real_walk = os.walk
+
+    def walk(top):
+        walked.append(top)
+        return real_walk(top)
+
+    monkeypatch.setattr(storage.os, "walk", walk)
+    assert store.list("run_reports/2025-08-09") == ["run_reports/2025-08-09.json"]
+    assert store.list("run_reports/") == [
+        "run_reports/2025-08-08.json",
+        "run_reports/2025-08-09.json",
+    ]
+    assert store.list("missing/") == []
+    assert walked == [str(tmp_path / "run_reports")] * 2 + [str(tmp_path / "missing")]
+
+
+@pytest.mark.parametrize("backend", ["memory", "local"])
+def test_list_prefixes_returns_one_level(backend, tmp_path):
+    store = (
+        storage.MemoryStore()
+        if backend == "memory"
+        else storage.LocalStore(str(tmp_path))
+    )
+    store.put("raw_payloads/location=a/model=nam/x.jsonl.gz", b"x")
+    store.put("raw_payloads/location=a/model=icon/y.jsonl.gz", b"y")
+    store.put("raw_payloads/location=b/model=nam/z.jsonl.gz", b"z")
+    store.put("raw_payloads/README", b"")
+
+    assert store.list_prefixes("raw_payloads/") == [
+        "raw_payloads/location=a/",
+        "raw_payloads/location=b/",
+    ]
+    assert store.list_prefixes("raw_payloads/location=a/") == [
+        "raw_payloads/location=a/model=icon/",
+        "raw_payloads/location=a/model=nam/",
+    ]
+    assert store.list_prefixes("") == ["raw_payloads/"]
+    assert store.list_prefixes("missing/") == []
+
+
+def test_store_requires_every_operation():
+    class PutOnly(storage.Store):
+        def put(self, key, body):
+            pass
+
+    with pytest.raises(TypeError):
+        PutOnly()
+
+
+def test_local_store_put_is_atomic_and_leaves_no_temp_files(tmp_path, monkeypatch):
+    store = storage.LocalStore(str(tmp_path))
+    store.put("a/key", b"old")
+
+    def boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage.os, "replace", boom)
+    with pytest.raises(OSError):
+        store.put("a/key", b"new")
+
+    # Original object is untouched and the temp file was cleaned up
+    assert store.get("a/key") == b"old"
+    assert os.listdir(tmp_path / "a") == ["key"]
+
+
+def test_local_store_rejects_escaping_keys(tmp_path):
+    store = storage.LocalStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.put("../outside", b"x")
+
+
+def test_local_store_missing_key_raises_keyerror(tmp_path):
+    with pytest.raises(KeyError):
+        storage.LocalStore(str(tmp_path)).get("missing")
+
+
+# ------------------------------- S3Store --------------------------------------
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def get_paginator(self, name):
+        objects = self.objects
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix, Delimiter=None):
+                keys = [k for (b, k) in objects if b == Bucket and k.startswith(Prefix)]
+                if Delimiter is None:
+                    yield {"Contents": [{"Key": k} for k in keys]}
+                    return
+                prefixes = {
+                    Prefix + k[len(Prefix) :].split(Delimiter, 1)[0] + Delimiter
+                    for k in keys
+                    if Delimiter in k[len(Prefix) :]
+                }
+                yield {"CommonPrefixes": [{"Prefix": p} for p in sorted(prefixes)]}
+
+        return Paginator()
+
+
+def test_s3_store_applies_prefix():
+    client = FakeS3Client()
+    store = storage.S3Store("bucket", "/env/dev/", client=client)
+    store.put("raw_forecasts/x.parquet", b"data")
+
+    assert ("bucket", "env/dev/raw_forecasts/x.parquet") in client.objects
+    assert store.get("raw_forecasts/x.parquet") == b"data"
+    assert store.list("raw_forecasts/") == ["raw_forecasts/x.parquet"]
+    assert store.list_prefixes("") == ["raw_forecasts/"]
+    with pytest.raises(KeyError):
+        store.get("missing")
+
+
+def test_default_store_uri_requires_configuration(monkeypatch):
+    monkeypatch.delenv("STORAGE_URI", raising=False)
+    monkeypatch.delenv("BUCKET", raising=False)
+    with pytest.raises(ValueError, match="STORAGE_URI or BUCKET"):
+        storage.default_store_uri()
+    assert storage.default_store_uri(fallback="memory://x") == "memory://x"
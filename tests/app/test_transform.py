@@ -0,0 +1,70 @@
+import io
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import src.transform as transform
+
+COLLECTED = datetime(2025, 8, 8, 22, 16, 24, tzinfo=timezone.utc)
+
+
+def test_coerce_batch_matches_pandas_coercion():
+    batch = transform.rows_to_batch(
+        ["forecast_time", "tmp", "rh", "ptype"],
+        [
+            ["2025-08-08 12:00Z", "15.2", "70", "RA"],
+            ["2025-08-08 15:00Z", "n/a", "", "SN"],
+            ["2025-08-08 18:00Z", " -3e1 ", "55", ""],
+        ],
+    )
+    table = transform.coerce_batch(batch, COLLECTED)
+
+    assert table.schema.field("forecast_time").type == pa.timestamp("ms")
+    assert table.column("tmp").to_pylist() == pytest.approx([15.2, None, -30.0])
+    assert table.column("tmp").to_pylist()[1] is None
+    assert table.column("rh").to_pylist() == [70, None, 55]
+    assert table.column("ptype").to_pylist() == ["RA", "SN", ""]
+    assert table.column("collected_time").type == pa.timestamp("us", tz="UTC")
+
+
+def test_rows_to_batch_reorders_by_position_and_rejects_short_rows():
+    batch = transform.rows_to_batch(["a", "b"], [["2", "1"]], positions=[1, 0])
+    assert batch.to_pydict() == {"a": ["1"], "b": ["2"]}
+    with pytest.raises(ValueError):
+        transform.rows_to_batch(["a", "b"], [["only"]])
+
+
+def test_rows_to_batch_fills_missing_positions_with_nulls():
+    batch = transform.rows_to_batch(
+        ["forecast_time", "tmp"], [["2025-08-08 12:00Z"]], positions=[0, None]
+    )
+    assert batch.to_pydict() == {"forecast_time": ["2025-08-08 12:00Z"], "tmp": [None]}
+    table = transform.coerce_batch(batch, COLLECTED)
+    assert table.schema.field("tmp").type == pa.float32()
+    assert table.column("tmp").to_pylist() == [None]
+
+
+def test_writer_streams_batches_into_one_object():
+    writer = transform.ForecastParquetWriter(COLLECTED)
+    for hour in range(3):
+        writer.write(
+            transform.rows_to_batch(
+                ["forecast_time", "tmp"], [[f"2025-08-08 {hour:02d}:00Z", "1"]]
+            )
+        )
+    parquet = pq.ParquetFile(io.BytesIO(writer.finish()))
+    assert writer.rows == 3
+    assert parquet.metadata.num_row_groups == 3
+
+
+def test_uncoerced_writer_keeps_strings():
+    writer = transform.ForecastParquetWriter(COLLECTED, coerce=False)
+    writer.write(transform.rows_to_batch(["tmp"], [["warm"]]))
+    table = pq.read_table(io.BytesIO(writer.finish()))
+    assert table.column("tmp").to_pylist() == ["warm"]
+
+
+def test_finish_without_rows_is_empty():
+    assert transform.ForecastParquetWriter(COLLECTED).finish() == b""
@@ -114,12 +114,12 @@ def test_lambda_is_docker_image_with_env(template: Template):
     )
 
 
-def test_eventbridge_rules_and_targets(template: Template):
-    # Morning rule 13:00 UTC -> cron(0 13 * * ? *)
+def test_eventbridge_freshness_rule_and_target(template: Template):
+    # Hourly rule at :15 -> cron(15 * * * ? *), invoking in freshness mode
     template.has_resource_properties(
         "AWS::Events::Rule",
         {
-            "ScheduleExpression": "cron(0 13 * * ? *)",
+            "ScheduleExpression": "cron(15 * * * ? *)",
             "Targets": Match.array_with(
                 [
                     Match.object_like(
@@ -129,29 +129,8 @@ def test_eventbridge_rules_and_targets(template: Template):
                                     Match.string_like_regexp("^DailyDataFunction.*"),
                                     "Arn",
                                 ]
-                            }
-                        }
-                    )
-                ]
-            ),
-        },
-    )
-
-    # Evening rule 02:00 UTC -> cron(0 2 * * ? *)
-    template.has_resource_properties(
-        "AWS::Events::Rule",
-        {
-            "ScheduleExpression": "cron(0 2 * * ? *)",
-            "Targets": Match.array_with(
-                [
-                    Match.object_like(
-                        {
-                            "Arn": {
-                                "Fn::GetAtt": [
-                                    Match.string_like_regexp("^DailyDataFunction.*"),
-                                    "Arn",
-                                ]
-                            }
+                            },
+                            "Input": '{"mode":"freshness"}',
                         }
                     )
                 ]
@@ -172,7 +151,7 @@ def test_glue_databases_created(template: Template):
 def test_resource_counts(template: Template):
     # Sanity check on counts
     template.resource_count_is("AWS::Lambda::Function", 1)
-    template.resource_count_is("AWS::Events::Rule", 2)
+    template.resource_count_is("AWS::Events::Rule", 1)
     template.resource_count_is("AWS::Logs::LogGroup", 1)
     template.resource_count_is("AWS::Glue::Database", 2)
     template.resource_count_is("AWS::IAM::Role", 1)
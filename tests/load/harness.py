@@ -0,0 +1,295 @@
+"""
+Local stand-ins for a production-shaped collection run: synthetic configs,
+a fake SpotWX server with injected latency and failures, and a fake
+Playwright whose pages fetch that server over HTTP.
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pyarrow as pa
+
+import src.collector as mod
+
+# Model codes from the plan's cost table, so priorities and costs vary
+MODEL_CODES = list(mod.plan.MODEL_COST_SECONDS)
+TIMEZONES = ["America/Vancouver", "America/Edmonton", "America/Denver", "UTC"]
+HEADERS = ["DATETIME", "TMP", "DPT", "RH", "WS", "WD", "APCP", "CLOUD"]
+
+
+def synthetic_config(locations: int, models: int, seed: int = 0) -> tuple[str, str]:
+    # LOCATIONS / MODELS JSON in the same shape the Lambda is deployed with
+    rng = random.Random(seed)
+    raw_locations = {
+        f"loc_{i:04d}": {
+            "lat": round(rng.uniform(42.0, 60.0), 2),
+            "lon": round(rng.uniform(-135.0, -110.0), 2),
+            "tz": TIMEZONES[i % len(TIMEZONES)],
+        }
+        for i in range(locations)
+    }
+    raw_models = {}
+    for i in range(models):
+        code = MODEL_CODES[i % len(MODEL_CODES)]
+        suffix = f"_{i // len(MODEL_CODES)}" if i >= len(MODEL_CODES) else ""
+        raw_models[f"{code.upper()}{suffix}"] = f"{code}{suffix}"
+    return json.dumps(raw_locations), json.dumps(raw_models)
+
+
+def forecast_table(url: str, rows: int) -> str:
+    rng = random.Random(url)
+    body = "".join(
+        "<tr>"
+        + f"<td>2025-08-{1 + h // 24:02d} {h % 24:02d}:00</td>"
+        + f"<td>{rng.uniform(-20, 30):.1f}</td>"
+        + f"<td>{rng.uniform(-25, 20):.1f}</td>"
+        + f"<td>{rng.randint(10, 100)}</td>"
+        + f"<td>{rng.randint(0, 60)}</td>"
+        + f"<td>{rng.randint(0, 359)}</td>"
+        + f"<td>{rng.uniform(0, 5):.1f}</td>"
+        + f"<td>{rng.randint(0, 100)}</td>"
+        + "</tr>"
+        for h in range(rows)
+    )
+    head = "".join(f"<th>{h}</th>" for h in HEADERS)
+    return (
+        "<html><body><div id='example_wrapper'><table id='example'>"
+        f"<thead><tr>{head}</tr></thead><tbody>{body}</tbody>"
+        "</table></div></body></html>"
+    )
+
+
+class ForecastServer:
+    # Serves one table per URL on 127.0.0.1. Whether the n-th request for a
+    # URL fails, and how long it takes, depends only on (seed, url, n), so a
+    # run is reproducible whatever order the workers happen to ask in.
+    def __init__(
+        self,
+        rows: int = 120,
+        latency_s: tuple = (0.005, 0.025),
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.rows = rows
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/spotwx"
+
+    def outcome(self, path: str, attempt: int) -> tuple[float, bool]:
+        rng = random.Random(f"{self.seed}:{path}:{attempt}")
+        return rng.uniform(*self.latency_s), rng.random() < self.failure_rate
+
+    def fails_every_attempt(self, url: str, attempts: int) -> bool:
+        parts = urlsplit(url)
+        path = f"{parts.path}?{parts.query}"
+        return all(self.outcome(path, n)[1] for n in range(1, attempts + 1))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    attempt = server.requests.get(self.path, 0) + 1
+                    server.requests[self.path] = attempt
+                delay, failed = server.outcome(self.path, attempt)
+                time.sleep(delay)
+
+                status = 503 if failed else 200
+                body = (
+                    "<html><body>Service unavailable</body></html>"
+                    if failed
+                    else forecast_table(self.path, server.rows)
+                ).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        return Handler
+
+    def __enter__(self) -> "ForecastServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+_TABLE = re.compile(r"<table.*?</table>", re.S)
+_HEADER = re.compile(r"<th>(.*?)</th>", re.S)
+_ROW = re.compile(r"<tr>((?:<td>.*?</td>)+)</tr>", re.S)
+_CELL = re.compile(r"<td>(.*?)</td>", re.S)
+
+
+class Table:
+    # What the page's table scripts would see. Regexes rather than an HTML
+    # parser: a real browser parses outside this process, so the stand-in
+    # should cost the collector as little CPU as possible.
+    def __init__(self, html: str = ""):
+        match = _TABLE.search(html)
+        self.found = match is not None
+        table = match.group(0) if match else ""
+        self.headers = [h.strip() for h in _HEADER.findall(table)]
+        self.rows = [
+            [cell.strip() for cell in _CELL.findall(row)] for row in _ROW.findall(table)
+        ]
+
+
+class FakeLocator:
+    def __init__(self, page, selector: str):
+        self.page = page
+        self.selector = selector
+
+    @property
+    def first(self):
+        return self
+
+    async def wait_for(self, state="visible", timeout=5000):
+        if self.selector == "table" and not self.page.table.found:
+            raise mod.PlaywrightTimeoutError(f"timeout waiting for {self.selector}")
+
+    async def click(self):
+        return
+
+
+class FakePage:
+    # Implements the handful of Page calls the collector makes, against HTML
+    # fetched from the fake server
+    def __init__(self):
+        self.table = Table()
+
+    async def goto(self, url, timeout=20000, wait_until="domcontentloaded"):
+        def fetch():
+            try:
+                with urllib.request.urlopen(url, timeout=timeout / 1000) as response:
+                    return response.read().decode()
+            except urllib.error.HTTPError as e:
+                # Like a browser, an error status still renders a page
+                return e.read().decode()
+            except TimeoutError as e:
+                raise mod.PlaywrightTimeoutError(str(e)) from e
+
+        self.table = Table(await asyncio.to_thread(fetch))
+
+    def locator(self, selector: str) -> FakeLocator:
+        return FakeLocator(self, selector)
+
+    async def wait_for_timeout(self, ms):
+        await asyncio.sleep(0)
+
+    async def evaluate(self, script, arg=None):
+        if script == mod.TABLE_HEADERS_JS:
+            if not self.table.found:
+                return {"headers": [], "count": 0}
+            return {"headers": self.table.headers, "count": len(self.table.rows)}
+        if script == mod.TABLE_ROWS_JS:
+            start, end = arg
+            return [list(row) for row in self.table.rows[start:end]]
+        raise NotImplementedError(script)
+
+    async def close(self):
+        return
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = 0
+
+    async def new_page(self):
+        self.pages += 1
+        return FakePage()
+
+    async def route(self, pattern, handler):
+        return
+
+    async def close(self):
+        return
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    async def new_context(self, **kwargs):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    async def close(self):
+        return
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+
+        async def launch(headless=True, args=None):
+            self.browsers.append(FakeBrowser())
+            return self.browsers[-1]
+
+        engine = type("Engine", (), {"launch": staticmethod(launch)})
+        self.chromium = self.firefox = self.webkit = engine
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class MemorySampler:
+    # Peak memory while a run is in flight. tracemalloc only sees the Python
+    # heap, so Arrow's memory pool (which holds the row data) and the RSS of
+    # the whole process tree are sampled alongside it.
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak_arrow_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self._task = None
+
+    def _sample(self) -> None:
+        arrow_mb = pa.total_allocated_bytes() / 1024 / 1024
+        self.peak_arrow_mb = max(self.peak_arrow_mb, arrow_mb)
+        rss_mb = mod.reports.process_tree_rss_mb()
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+    async def _run(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval_s)
+
+    async def __aenter__(self) -> "MemorySampler":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
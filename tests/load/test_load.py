@@ -0,0 +1,110 @@
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from tests.load import harness
+
+mod = harness.mod
+
+# Defaults finish in seconds; scale up with e.g.
+#   LOAD_LOCATIONS=300 LOAD_MODELS=12 LOAD_CONCURRENCY=16 make test-load
+LOCATIONS = int(os.environ.get("LOAD_LOCATIONS", "25"))
+MODELS = int(os.environ.get("LOAD_MODELS", "4"))
+CONCURRENCY = int(os.environ.get("LOAD_CONCURRENCY", "8"))
+ROWS = int(os.environ.get("LOAD_ROWS", "120"))
+LATENCY_MS = tuple(
+    float(ms) / 1000 for ms in os.environ.get("LOAD_LATENCY_MS", "5,25").split(",")
+)
+FAILURE_RATE = float(os.environ.get("LOAD_FAILURE_RATE", "0.1"))
+SEED = int(os.environ.get("LOAD_SEED", "0"))
+
+# Ceilings the run is held to
+MIN_PAIRS_PER_S = float(os.environ.get("LOAD_MIN_PAIRS_PER_S", "5"))
+TIMEOUT_S = float(os.environ.get("LOAD_TIMEOUT_S", "60"))
+# Python heap (tracemalloc) plus Arrow's memory pool, and the process tree
+MAX_PEAK_MB = float(os.environ.get("LOAD_MAX_PEAK_MB", "64"))
+MAX_RSS_MB = float(os.environ.get("LOAD_MAX_RSS_MB", "1024"))
+
+# Same headroom the performance budget keeps under the 600s Lambda timeout
+HEADROOM = mod.reports.DEFAULT_BUDGET["max_duration_s"] / 600
+
+
+@pytest.fixture
+def load_env(monkeypatch, tmp_path):
+    raw_locations, raw_models = harness.synthetic_config(LOCATIONS, MODELS, SEED)
+    server = harness.ForecastServer(ROWS, LATENCY_MS, FAILURE_RATE, SEED)
+    monkeypatch.setattr(mod, "LOCATIONS", raw_locations)
+    monkeypatch.setattr(mod, "MODELS", raw_models)
+    monkeypatch.setattr(mod, "FORECASTS_URL", server.url)
+    monkeypatch.setattr(mod, "MIN_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "MAX_SLEEP_TIME", 0)
+    monkeypatch.setattr(mod, "ENCODE_PROCESSES", "0")
+    monkeypatch.setattr(mod, "SCHEMAS", mod.schema.SchemaRegistry())
+    monkeypatch.setattr(mod, "async_playwright", harness.FakePlaywright)
+    with server:
+        yield server, mod.storage.LocalStore(str(tmp_path / "store"))
+
+
+@pytest.mark.asyncio
+async def test_run_job_at_scale(load_env):
+    server, store = load_env
+    pairs = LOCATIONS * MODELS
+
+    tracemalloc.start()
+    started = time.monotonic()
+    try:
+        async with harness.MemorySampler() as memory:
+            results = await mod.run_job(store=store, concurrency=CONCURRENCY)
+    finally:
+        duration = time.monotonic() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    python_mb = peak / 1024 / 1024
+    peak_mb = python_mb + memory.peak_arrow_mb
+    print(
+        f"{pairs} pairs in {duration:.2f}s ({pairs / duration:.1f}/s), "
+        f"{sum(server.requests.values())} requests, peak {python_mb:.1f} MB "
+        f"Python + {memory.peak_arrow_mb:.1f} MB Arrow, "
+        f"{memory.peak_rss_mb:.0f} MB RSS"
+    )
+
+    # Exactly the pairs that were served a 503 come back empty
+    assert len(results) == pairs
+    expected_failures = {
+        (item.location, item.model_name)
+        for item in mod.work_plan()
+        if server.fails_every_attempt(item.url, 1)
+    }
+    failures = {(r["location"], r["model"]) for r in results if not r["rows"]}
+    assert failures == expected_failures
+    assert all(r["rows"] == ROWS for r in results if r["rows"])
+    assert len(store.list("raw_forecasts/")) == pairs - len(failures)
+
+    # The combined snapshot holds every collected pair
+    latest = mod.latest.read_latest(store)
+    assert latest.num_rows == (pairs - len(failures)) * ROWS
+
+    # Throughput, timeout headroom and memory ceiling
+    assert pairs / duration >= MIN_PAIRS_PER_S
+    assert duration <= TIMEOUT_S * HEADROOM
+    assert memory.peak_arrow_mb > 0
+    assert peak_mb <= MAX_PEAK_MB
+    assert memory.peak_rss_mb <= MAX_RSS_MB
+
+    (key,) = store.list("run_reports/")
+    report = json.loads(store.get(key))
+    assert report["pairs"] == pairs
+    assert report["failed_pairs"] == len(failures)
+    assert report["duration_s"] <= TIMEOUT_S * HEADROOM
+
+
+def test_synthetic_config_is_deterministic_and_valid():
+    raw_locations, raw_models = harness.synthetic_config(30, 15, seed=1)
+    assert (raw_locations, raw_models) == harness.synthetic_config(30, 15, seed=1)
+
+    items = mod.plan.build_plan(raw_locations, raw_models, "http://localhost/spotwx")
+    assert len(items) == 30 * 15
+    assert len({item.url for item in items}) == len(items)